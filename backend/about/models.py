@@ -1,13 +1,6 @@
 """about/models.py."""
 
-from contacts.blocks import ContactImportBlock
 from django.utils.translation import gettext_lazy as _
-from home.blocks import (
-    AboutBlock,
-    EcoBannerBlock,
-    HeroBlock,
-    StatsBlock,
-)
 from wagtail import blocks
 from wagtail.admin.panels import FieldPanel
 from wagtail.fields import StreamField
@@ -18,6 +11,13 @@ from about.blocks import (
     WholesaleIntroBlock,
     WholesaleTabsBlock,
 )
+from contacts.blocks import ContactImportBlock
+from home.blocks import (
+    AboutBlock,
+    EcoBannerBlock,
+    HeroBlock,
+    StatsBlock,
+)
 
 # pylint: disable=too-few-public-methods
 
@@ -3,12 +3,13 @@
 import logging
 
 from django.utils.translation import gettext_lazy as _
-from home.blocks import HeroBlock
 from wagtail import blocks
 from wagtail.admin.panels import FieldPanel
 from wagtail.fields import StreamField
 from wagtail.models import Page
 
+from home.blocks import HeroBlock
+
 from .blocks import DetailedContactsBlock
 
 logger = logging.getLogger(__name__)
@@ -0,0 +1,22 @@
+"""core/middleware.py."""
+
+from http import HTTPStatus
+
+from django.middleware.locale import LocaleMiddleware as BaseLocaleMiddleware
+
+
+class LocaleMiddleware(BaseLocaleMiddleware):
+    """Activate the request language, leaving JSON 404 responses alone.
+
+    Django redirects a 404 on a path without a language prefix to the
+    prefixed path, which the Wagtail catch-all always accepts. A JSON answer
+    of an API is not a page missing its prefix, so it is returned as is.
+    """
+
+    def process_response(self, request, response):
+        """Add the language headers, or redirect to the language prefix."""
+        if response.status_code == HTTPStatus.NOT_FOUND and response.get(
+            "Content-Type", ""
+        ).startswith("application/json"):
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,153 @@
+"""core/pagination.py."""
+
+import json
+import logging
+import math
+
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+logger = logging.getLogger(__name__)
+
+ESTIMATE_THRESHOLD = 10_000
+
+
+class LazyCountPage(Page):
+    """A page that knows whether a next page exists without a total count."""
+
+    def __init__(self, object_list, number, paginator, *, has_next):
+        """Store the page rows and the result of the look-ahead fetch."""
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        """Return True if at least one more row exists after this page."""
+        return self._has_next
+
+
+class LazyCountPaginator(Paginator):
+    """Paginator that never counts rows just to serve a page.
+
+    ``page()`` fetches one extra row to tell whether a next page exists, so
+    "Show more" and next/previous links cost no ``COUNT(*)``. The total count
+    is only computed when something asks for ``count`` or ``num_pages``, and
+    then it is resolved, in order, from:
+
+    * an explicit ``count`` passed by the caller;
+    * the cache, when a ``count_cache_key`` is given (the caller versions it);
+    * the planner's estimate (``pg_class.reltuples`` for an unfiltered table,
+      ``EXPLAIN`` otherwise) when that estimate exceeds ``estimate_threshold``;
+    * an exact ``COUNT(*)``.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(  # noqa: PLR0913
+        self,
+        object_list,
+        per_page,
+        orphans=0,
+        allow_empty_first_page=True,  # noqa: FBT002
+        *,
+        count=None,
+        count_cache_key=None,
+        count_cache_timeout=None,
+        estimate_threshold=ESTIMATE_THRESHOLD,
+    ):
+        """Configure the paginator and the sources it may take the count from."""
+        super().__init__(object_list, per_page, orphans, allow_empty_first_page)
+        self._count = count
+        self.count_cache_key = count_cache_key
+        self.count_cache_timeout = count_cache_timeout
+        self.estimate_threshold = estimate_threshold
+
+    def validate_number(self, number):
+        """Validate a page number without comparing it to the page count."""
+        if isinstance(number, float) and not number.is_integer():
+            raise PageNotAnInteger(self.error_messages["invalid_page"])
+        try:
+            number = int(number)
+        except (TypeError, ValueError) as exc:
+            raise PageNotAnInteger(self.error_messages["invalid_page"]) from exc
+        if number < 1:
+            raise EmptyPage(self.error_messages["min_page"])
+        return number
+
+    def page(self, number):
+        """Return a page, fetching the orphans and one extra row instead of counting.
+
+        As with ``Paginator``, a last page of ``orphans`` rows or fewer is
+        merged into the page before it.
+        """
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page + self.orphans
+        rows = list(self.object_list[bottom : top + 1])
+        if number > 1 and len(rows) <= self.orphans:
+            raise EmptyPage(self.error_messages["no_results"])
+        has_next = len(rows) > top - bottom
+        if has_next:
+            rows = rows[: self.per_page]
+        return LazyCountPage(rows, number, self, has_next=has_next)
+
+    def get_page(self, number):
+        """Return a valid page, falling back like ``Paginator.get_page``.
+
+        An out-of-range number falls back to the last page of an exact count,
+        since an estimated count may point past the end of the data.
+        """
+        try:
+            return self.page(number)
+        except PageNotAnInteger:
+            return self.page(1)
+        except EmptyPage:
+            hits = max(1, self._exact_count() - self.orphans)
+            return self.page(math.ceil(hits / self.per_page))
+
+    @cached_property
+    def count(self):
+        """Return the total number of objects from the cheapest available source."""
+        if self._count is not None:
+            return self._count
+        if self.count_cache_key:
+            return cache.get_or_set(
+                self.count_cache_key, self._exact_count, self.count_cache_timeout
+            )
+        estimate = self._estimate_count()
+        if estimate is not None and estimate >= self.estimate_threshold:
+            logger.debug("Using estimated count %d for pagination", estimate)
+            return estimate
+        return self._exact_count()
+
+    def _exact_count(self):
+        """Count the objects exactly."""
+        return Paginator.count.func(self)
+
+    def _estimate_count(self):
+        """Return the planner's row estimate for a PostgreSQL queryset, or None."""
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return None
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return None
+
+        query = queryset.query
+        with connection.cursor() as cursor:
+            if not query.where and not query.distinct and not query.combinator:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],  # noqa: SLF001
+                )
+                row = cursor.fetchone()
+                # reltuples is -1 until the table was vacuumed or analyzed.
+                return row[0] if row and row[0] >= 0 else None
+
+            sql, params = queryset.order_by().query.sql_with_params()
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
@@ -42,10 +42,7 @@ def _get_product_translated_url(request, product, lang_code):
         shop_page = ShopIndexPage.objects.filter(live=True, locale=locale).first()
         if shop_page:
             shop_url = shop_page.get_url(request)
-            translated_slug = (
-                getattr(product, f"slug_{lang_code}", None) or product.slug
-            )
-            return f"{shop_url}{translated_slug}/"
+            return f"{shop_url}{product.get_slug(lang_code)}/"
     return None
 
 
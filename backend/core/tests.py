@@ -1 +1,54 @@
 """core/tests.py."""
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.pagination import LazyCountPaginator
+
+
+class LazyCountPaginatorTests(TestCase):
+    """Tests for the paginator that avoids COUNT(*) queries."""
+
+    def setUp(self):
+        """Create a few rows to paginate."""
+        user_model = get_user_model()
+        for index in range(5):
+            user_model.objects.create(username=f"user-{index}")
+        self.queryset = user_model.objects.order_by("username")
+
+    def test_pages_do_not_count(self):
+        """Test that serving a page issues a single query and no COUNT."""
+        paginator = LazyCountPaginator(self.queryset, 2)
+        with CaptureQueriesContext(connection) as queries:
+            first = paginator.page(1)
+            last = paginator.page(3)
+        assert len(queries) == 2  # noqa: PLR2004
+        assert not any("COUNT(" in query["sql"] for query in queries)
+        assert first.has_next()
+        assert first.next_page_number() == 2  # noqa: PLR2004
+        assert not last.has_next()
+        assert len(last) == 1
+
+    def test_out_of_range_page_falls_back_to_last_page(self):
+        """Test that get_page clamps like Django's paginator."""
+        paginator = LazyCountPaginator(self.queryset, 2)
+        assert paginator.get_page(99).number == 3  # noqa: PLR2004
+        assert paginator.get_page("x").number == 1
+
+    def test_orphans_join_the_previous_page(self):
+        """Test that a short last page is merged like Django's paginator."""
+        paginator = LazyCountPaginator(self.queryset, 2, orphans=1)
+        second = paginator.page(2)
+        assert not second.has_next()
+        assert len(second) == 3  # noqa: PLR2004
+        assert paginator.page(1).has_next()
+        assert paginator.get_page(3).number == 2  # noqa: PLR2004
+
+    def test_count_prefers_explicit_value(self):
+        """Test that a count supplied by the caller is used as-is."""
+        paginator = LazyCountPaginator(self.queryset, 2, count=42)
+        with CaptureQueriesContext(connection) as queries:
+            assert paginator.num_pages == 21  # noqa: PLR2004
+        assert len(queries) == 0
@@ -2,16 +2,16 @@
 
 import logging
 
-from contacts.blocks import ContactImportBlock
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
 from django.template.response import TemplateResponse
 from django.utils.translation import gettext_lazy as _
-from home.blocks import HeroBlock
 from wagtail.admin.panels import FieldPanel
 from wagtail.fields import StreamField
 from wagtail.models import Page
 
+from contacts.blocks import ContactImportBlock
 from gallery.blocks import GallerySectionBlock
+from home.blocks import HeroBlock
 
 logger = logging.getLogger(__name__)
 
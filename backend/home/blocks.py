@@ -195,7 +195,11 @@ class FeaturedProductsBlock(blocks.StructBlock):
         product = apps.get_model("shop", "Product")
 
         count = value.get("count", 3)
-        products = product.objects.filter(live=True).order_by("-created_at")[:count]
+        products = (
+            product.objects.filter(live=True)
+            .for_listing()
+            .order_by("-created_at")[:count]
+        )
 
         context["products"] = products
         return context
@@ -1,11 +1,12 @@
 """home/models.py."""
 
-from contacts.blocks import ContactImportBlock
 from django.utils.translation import gettext_lazy as _
 from wagtail.admin.panels import FieldPanel
 from wagtail.fields import StreamField
 from wagtail.models import Page
 
+from contacts.blocks import ContactImportBlock
+
 from .blocks import (
     AboutBlock,
     BenefitsBlock,
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 from pathlib import Path
 
 import environ
+from celery.schedules import crontab
 from django.urls import reverse_lazy
 from django.utils.translation import gettext_lazy as _
 
@@ -78,7 +79,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
-    "django.middleware.locale.LocaleMiddleware",
+    "core.middleware.LocaleMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -346,6 +347,21 @@ CACHES = {
 # SESSION_ENGINE = "django.contrib.sessions.backends.cache"
 # SESSION_CACHE_ALIAS = "default"
 
+# --- SHOP CONFIGURATION
+# Serve catalog listings from the denormalized ProductListing read model.
+# Run "manage.py rebuild_product_listings" before enabling it.
+SHOP_CATALOG_READ_MODEL = env.bool("SHOP_CATALOG_READ_MODEL", default=False)
+# Cache full catalog and product detail responses for anonymous visitors.
+SHOP_CATALOG_PAGE_CACHE = env.bool("SHOP_CATALOG_PAGE_CACHE", default=True)
+# Re-render the most requested catalog pages after catalog changes.
+# Requires a running Celery worker.
+SHOP_CATALOG_WARMUP = env.bool("SHOP_CATALOG_WARMUP", default=False)
+# Where anonymous visitors' carts are kept until they log in or check out:
+# "shop.carts.RedisCart" or "shop.carts.DatabaseCart".
+SHOP_ANONYMOUS_CART_BACKEND = env(
+    "SHOP_ANONYMOUS_CART_BACKEND", default="shop.carts.RedisCart"
+)
+
 # --- CELERY CONFIGURATION
 CELERY_BROKER_URL = env("CELERY_BROKER_URL")
 CELERY_RESULT_BACKEND = env("CELERY_RESULT_BACKEND")
@@ -358,6 +374,17 @@ CELERY_TIMEZONE = "UTC"
 # Дополнительные настройки для надежности
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
 
+CELERY_BEAT_SCHEDULE = {
+    "rebuild-product-recommendations": {
+        "task": "shop.tasks.rebuild_product_recommendations_task",
+        "schedule": crontab(hour=3, minute=0),
+    },
+    "decay-sales-rank": {
+        "task": "shop.tasks.decay_sales_rank_task",
+        "schedule": crontab(hour=3, minute=30),
+    },
+}
+
 # --- Email Configuration (Base) ---
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 EMAIL_HOST = env("EMAIL_HOST")
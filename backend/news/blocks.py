@@ -2,12 +2,13 @@
 
 import logging
 
-from contacts.blocks import SocialLinkBlock
 from django.utils.translation import gettext_lazy as _
 from wagtail import blocks
 from wagtail.images.blocks import ImageChooserBlock
 from wagtailmedia.blocks import VideoChooserBlock
 
+from contacts.blocks import SocialLinkBlock
+
 logger = logging.getLogger(__name__)
 
 
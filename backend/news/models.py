@@ -2,17 +2,17 @@
 
 import logging
 
-from contacts.blocks import ContactImportBlock
-from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
 from django.db import models
 from django.template.response import TemplateResponse
 from django.utils.translation import gettext_lazy as _
-from home.blocks import EcoBannerBlock
 from wagtail import blocks
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel
 from wagtail.fields import StreamField
 from wagtail.models import Page
 
+from contacts.blocks import ContactImportBlock
+from core.pagination import LazyCountPaginator
+from home.blocks import EcoBannerBlock
 from news.blocks import MediaOverlayBlock, SidebarSocialBlock
 
 logger = logging.getLogger(__name__)
@@ -191,15 +191,8 @@ class NewsIndexPage(Page):  # pylint: disable=too-many-ancestors
         """Add paginated news items to the context."""
         context = super().get_context(request, *args, **kwargs)
         all_news = NewsPage.objects.live().child_of(self).order_by("-date")
-        paginator = Paginator(all_news, self.news_per_page)
-        page = request.GET.get("page")
-
-        try:
-            news_items = paginator.page(page)
-        except PageNotAnInteger:
-            news_items = paginator.page(1)
-        except EmptyPage:
-            news_items = paginator.page(paginator.num_pages)
+        paginator = LazyCountPaginator(all_news, self.news_per_page)
+        news_items = paginator.get_page(request.GET.get("page"))
 
         context["news_items"] = news_items
         return context
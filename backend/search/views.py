@@ -1,9 +1,13 @@
 """search/views.py."""
 
-from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
 from django.template.response import TemplateResponse
 from wagtail.models import Page
 
+from core.pagination import LazyCountPaginator
+from shop.models import Product
+
+PRODUCT_RESULTS_LIMIT = 8
+
 # To enable logging of search queries for use with the "Promoted search results" module
 # <https://docs.wagtail.org/en/stable/reference/contrib/searchpromotions.html>
 # uncomment the following line and the lines indicated in the search function
@@ -13,13 +17,23 @@ from wagtail.models import Page
 
 
 def search(request):
-    """Handle search queries and return paginated search results."""
+    """Handle search queries and return paginated search results.
+
+    Products are not pages, so the best product matches are searched with
+    their own full-text index and listed above the page results on the
+    first page.
+    """
     search_query = request.GET.get("query", None)
     page = request.GET.get("page", 1)
+    product_results = []
 
     # Search
     if search_query:
         search_results = Page.objects.live().search(search_query)
+        if str(page) == "1":
+            product_results = Product.objects.filter(live=True).search(search_query)[
+                :PRODUCT_RESULTS_LIMIT
+            ]
 
         # To log this query for use with the "Promoted search results" module:
 
@@ -30,13 +44,8 @@ def search(request):
         search_results = Page.objects.none()
 
     # Pagination
-    paginator = Paginator(search_results, 10)
-    try:
-        search_results = paginator.page(page)
-    except PageNotAnInteger:
-        search_results = paginator.page(1)
-    except EmptyPage:
-        search_results = paginator.page(paginator.num_pages)
+    paginator = LazyCountPaginator(search_results, 10)
+    search_results = paginator.get_page(page)
 
     return TemplateResponse(
         request,
@@ -44,5 +53,6 @@ def search(request):
         {
             "search_query": search_query,
             "search_results": search_results,
+            "product_results": product_results,
         },
     )
@@ -16,6 +16,7 @@ from .models import (
     ProductTaste,
     ProductWeight,
 )
+from .signals import record_catalog_changes
 
 logger = logging.getLogger(__name__)
 
@@ -99,7 +100,9 @@ class ProductAdmin(ModelAdmin, TabbedTranslationAdmin):
     @action(description=_("Опубликовать выбранные товары"))
     def make_published(self, request, queryset):
         """Admin action to bulk publish selected products (set live=True)."""
+        product_ids = list(queryset.values_list("id", flat=True))
         updated_count = queryset.update(live=True)
+        record_catalog_changes(listing_ids=product_ids, bump_catalog=True)
         logger.info(
             "User %s published %d products via admin action.",
             request.user,
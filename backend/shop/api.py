@@ -1,23 +1,91 @@
 """shop/api.py."""
 
+import hashlib
 import json
 import logging
 
-from django.db import transaction
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from django.template.loader import render_to_string
+from django.utils import translation
 from django.utils.translation import gettext as _
-from ninja import Form, Router
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from ninja import Field, Form, Router, Schema
+from wagtail.models import Locale
 
-from .models.ecommerce import CartItem, get_or_create_cart
-from .models.products import Product
+from .api_v1 import cached_json, serialize_price
+from .cache import catalog_cache_key, get_cart_version, get_catalog_version, make_etag
+from .carts import MAX_LINE_QUANTITY, get_cart
+from .models.products import Product, ShopIndexPage
 
 # pylint: disable=no-member
 
 logger = logging.getLogger(__name__)
 router = Router()
 
+AUTOCOMPLETE_LIMIT = 8
+AUTOCOMPLETE_MIN_LENGTH = 2
+AUTOCOMPLETE_MAX_LENGTH = 64
+CART_ITEM_ACTIONS = {"increase": 1, "decrease": -1}
+MAX_BATCH_CHANGES = 100
+
+
+class CartLineChange(Schema):
+    """One change of a cart line: a quantity delta, or the removal of the line."""
+
+    item_id: int
+    delta: int = Field(0, ge=-MAX_LINE_QUANTITY, le=MAX_LINE_QUANTITY)
+    remove: bool = False
+
+
+class CartBatch(Schema):
+    """A batch of cart line changes applied together."""
+
+    changes: list[CartLineChange] = Field(..., max_length=MAX_BATCH_CHANGES)
+
+
+def merge_line_changes(changes):
+    """Fold line changes into one delta per line, None meaning removal.
+
+    Deltas of the same line are summed, and a removal wins over any delta.
+    """
+    merged = {}
+    for change in changes:
+        if change.remove:
+            merged[change.item_id] = None
+        elif merged.get(change.item_id, 0) is not None:
+            merged[change.item_id] = merged.get(change.item_id, 0) + change.delta
+    return merged
+
+
+def cart_count_etag(request, *args, **kwargs):  # pylint: disable=unused-argument
+    """Return the ETag of the header counter, derived from the cart version."""
+    return make_etag("cart-count", get_cart_version(request))
+
+
+def mini_cart_etag(request, *args, **kwargs):  # pylint: disable=unused-argument
+    """Return the ETag of the mini-cart, derived from the cart and catalog versions.
+
+    The catalog version is included because the mini-cart shows product
+    titles, prices and images.
+    """
+    return make_etag(
+        "mini-cart",
+        get_cart_version(request),
+        get_catalog_version(),
+        translation.get_language(),
+    )
+
+
+def get_shop_url():
+    """Return the URL of the live shop page for the active locale."""
+    shop_pages = ShopIndexPage.objects.live()
+    shop_page = (
+        shop_pages.filter(locale=Locale.get_active()).first() or shop_pages.first()
+    )
+    return shop_page.url if shop_page else None
+
 
 def get_cart_update_response(request, cart):
     """Generate a single HttpResponse containing multiple OOB (Out-Of-Band) swaps.
@@ -25,11 +93,12 @@ def get_cart_update_response(request, cart):
     This seamlessly updates the mini-cart, header counter, checkout table,
     and totals without triggering multiple GET requests.
     """
-    total_items = sum(item.quantity for item in cart.items.all())
-    total_price = cart.get_total_price()
+    summary = cart.get_summary()
+    total_items = summary.total_items
+    total_price = summary.total_price
 
     html = render_to_string(
-        "shop/includes/mini_cart.html", {"cart": cart}, request=request
+        "shop/includes/mini_cart.html", {"cart": summary}, request=request
     )
 
     counter_html = (
@@ -38,7 +107,7 @@ def get_cart_update_response(request, cart):
     )
 
     cart_table_html = render_to_string(
-        "shop/includes/cart_table.html", {"cart": cart}, request=request
+        "shop/includes/cart_table.html", {"cart": summary}, request=request
     )
     table_oob = (
         f"<div id='checkout-cart-table' hx-swap-oob='true'>{cart_table_html}</div>"
@@ -71,59 +140,44 @@ def get_cart_update_response(request, cart):
 
 
 @router.get("/cart/count/")
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=cart_count_etag)
 def get_cart_count(request):
     """Return only the HTML snippet for the cart items count badge in the header."""
-    cart = get_or_create_cart(request)
-    total_items = sum(item.quantity for item in cart.items.all())
+    total_items = get_cart(request).get_total_items()
     return HttpResponse(
         f"<span id='cart-counter' class='quantity'>{total_items}</span>"
     )
 
 
 @router.get("/cart/mini/")
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=mini_cart_etag)
 def get_mini_cart(request):
     """Return the rendered HTML template for the mini-cart dropdown."""
-    cart = get_or_create_cart(request)
+    summary = get_cart(request).get_summary()
     html = render_to_string(
-        "shop/includes/mini_cart.html", {"cart": cart}, request=request
+        "shop/includes/mini_cart.html", {"cart": summary}, request=request
     )
     return HttpResponse(html)
 
 
 @router.post("/cart/add/{product_id}/")
-def add_to_cart(request, product_id: int, quantity: int = Form(1)):
-    """Add a product to the cart via HTMX.
-
-    Uses atomic transaction to ensure safe data insertion.
-    """
-    cart = get_or_create_cart(request)
+def add_to_cart(
+    request, product_id: int, quantity: int = Form(1, ge=1, le=MAX_LINE_QUANTITY)
+):
+    """Add a product to the cart via HTMX."""
+    cart = get_cart(request)
     product = get_object_or_404(Product, id=product_id, live=True)
+    cart.add(product, quantity)
 
-    with transaction.atomic():
-        cart_item, created = CartItem.objects.get_or_create(cart=cart, product=product)
-        if not created:
-            cart_item.quantity += quantity
-            logger.info(
-                "Updated quantity for '%s' (ID: %s) in Cart ID: %s",
-                product.title,
-                product.id,
-                cart.id,
-            )
-        else:
-            cart_item.quantity = quantity
-            logger.info(
-                "Added new product '%s' (ID: %s) to Cart ID: %s",
-                product.title,
-                product.id,
-                cart.id,
-            )
-        cart_item.save()
-
-    total_items = sum(item.quantity for item in cart.items.all())
-    counter_html = f"<span id='cart-counter' class='quantity'>{total_items}</span>"
+    summary = cart.get_summary()
+    counter_html = (
+        f"<span id='cart-counter' class='quantity'>{summary.total_items}</span>"
+    )
 
     mini_cart_inner_html = render_to_string(
-        "shop/includes/mini_cart.html", {"cart": cart}, request=request
+        "shop/includes/mini_cart.html", {"cart": summary}, request=request
     )
     oob_mini_cart = (
         f'<div id="mini-cart-container" class="mini-cart-dropdown" '
@@ -141,41 +195,61 @@ def add_to_cart(request, product_id: int, quantity: int = Form(1)):
 @router.post("/cart/item/{item_id}/update/")
 def update_cart_item(request, item_id: int, action: str = Form(...)):
     """Increase or decrease the quantity of a specific cart item atomically."""
-    cart = get_or_create_cart(request)
-    item = get_object_or_404(CartItem, id=item_id, cart=cart)
-
-    with transaction.atomic():
-        if action == "increase":
-            item.quantity += 1
-            item.save()
-            logger.debug(
-                "Increased quantity to %s for CartItem ID: %s", item.quantity, item.id
-            )
-        elif action == "decrease":
-            if item.quantity > 1:
-                item.quantity -= 1
-                item.save()
-                logger.debug(
-                    "Decreased quantity to %s for CartItem ID: %s",
-                    item.quantity,
-                    item.id,
-                )
-            else:
-                item.delete()
-                logger.info(
-                    "Removed CartItem ID: %s because quantity reached 0", item.id
-                )
-
+    cart = get_cart(request)
+    if action in CART_ITEM_ACTIONS:
+        cart.change(item_id, CART_ITEM_ACTIONS[action])
     return get_cart_update_response(request, cart)
 
 
 @router.post("/cart/item/{item_id}/remove/")
 def remove_cart_item(request, item_id: int):
     """Remove an item from the cart completely (e.g., via cross button)."""
-    cart = get_or_create_cart(request)
-    item = get_object_or_404(CartItem, id=item_id, cart=cart)
-    item.delete()
+    cart = get_cart(request)
+    cart.remove(item_id)
+    return get_cart_update_response(request, cart)
 
-    logger.info("Manually removed CartItem ID: %s from Cart ID: %s", item_id, cart.id)
 
+@router.post("/cart/batch/")
+def update_cart_batch(request, payload: CartBatch):
+    """Apply many line changes in one transaction and return all fragments.
+
+    Lets the cart page collapse rapid +/- clicks on many lines into a single
+    request. Lines that are not in the cart are ignored.
+    """
+    cart = get_cart(request)
+    cart.apply_changes(merge_line_changes(payload.changes))
     return get_cart_update_response(request, cart)
+
+
+@router.get("/autocomplete/")
+def autocomplete(request, q: str = "", limit: int = AUTOCOMPLETE_LIMIT):
+    """Return the live products matching a typeahead term.
+
+    Terms are normalized before the lookup and results are capped, so the
+    cache holds one small entry per prefix and catalog version.
+    """
+    term = " ".join(q.split())[:AUTOCOMPLETE_MAX_LENGTH].lower()
+    limit = min(max(limit, 1), AUTOCOMPLETE_LIMIT)
+    if len(term) < AUTOCOMPLETE_MIN_LENGTH:
+        return {"items": []}
+
+    digest = hashlib.blake2b(term.encode(), digest_size=16).hexdigest()
+    key = catalog_cache_key("autocomplete", limit, digest)
+
+    def build():
+        shop_url = get_shop_url()
+        products = Product.objects.filter(live=True).autocomplete(term)[:limit]
+        return {
+            "items": [
+                {
+                    "id": product.id,
+                    "title": str(product.title),
+                    "sku": product.sku,
+                    "price": serialize_price(product.price),
+                    "url": f"{shop_url}{product.slug}/" if shop_url else None,
+                }
+                for product in products
+            ]
+        }
+
+    return cached_json(key, build)
@@ -0,0 +1,278 @@
+"""shop/api_v1.py."""
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import translation
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from ninja import Query, Router
+
+from . import carts
+from .cache import (
+    CATALOG_CACHE_TIMEOUT,
+    catalog_cache_key,
+    get_cart_version,
+    get_catalog_version,
+    make_etag,
+)
+from .facets import get_catalog_facets, get_price_histogram
+from .models import Product, ProductListing
+from .models.products import (
+    CATALOG_ORDERINGS,
+    DETAIL_RENDITION,
+    parse_id_list,
+    parse_price,
+)
+from .pagination import KeysetPaginator
+from .renderers import dumps
+
+# pylint: disable=no-member, too-many-arguments
+
+logger = logging.getLogger(__name__)
+router = Router()
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+LISTING_FIELDS = (
+    "id",
+    "title",
+    "slug",
+    "sku",
+    "price",
+    "old_price",
+    "is_new",
+    "is_sale",
+    "images",
+    "taste_ids",
+    "tastes",
+    "weight_id",
+    "weight",
+    "packaging",
+)
+DETAIL_FIELDS = (
+    *LISTING_FIELDS,
+    "energy_value",
+    "shelf_life",
+    "composition",
+    "storage_conditions",
+)
+
+
+def parse_fields(fields, allowed):
+    """Return the requested subset of ``allowed`` fields, or all of them."""
+    if not fields:
+        return allowed
+    requested = {field.strip() for field in fields.split(",")}
+    return tuple(field for field in allowed if field in requested) or allowed
+
+
+def serialize_image(image):
+    """Return a rendition (or a stored rendition dict) as plain data."""
+    if isinstance(image, dict):
+        return image
+    return {
+        "url": image.url,
+        "width": image.width,
+        "height": image.height,
+        "alt": image.alt,
+    }
+
+
+def serialize_price(price):
+    """Return a whole-number price as an int, keeping None as is."""
+    return None if price is None else int(price)
+
+
+CARD_SERIALIZERS = {
+    "id": lambda product: product.id,
+    "title": lambda product: str(product.title),
+    "slug": lambda product: product.slug,
+    "sku": lambda product: product.sku,
+    "price": lambda product: serialize_price(product.price),
+    "old_price": lambda product: serialize_price(product.old_price),
+    "is_new": lambda product: product.is_new,
+    "is_sale": lambda product: product.is_sale,
+    "images": lambda product: [
+        serialize_image(image) for image in product.get_card_images()
+    ],
+    "taste_ids": lambda product: list(product.taste_ids),
+    "tastes": lambda product: product.get_tastes_display(),
+    "weight_id": lambda product: product.weight_option_id,
+    "weight": lambda product: product.get_weight_name(),
+    "packaging": lambda product: product.get_packaging_name(),
+}
+
+
+def serialize_card(product, fields):
+    """Serialize a Product or ProductListing to the requested listing fields.
+
+    Only the requested fields are computed.
+    """
+    return {field: CARD_SERIALIZERS[field](product) for field in fields}
+
+
+def serialize_product(product, fields):
+    """Serialize a Product to the detail fields."""
+    data = serialize_card(
+        product,
+        [field for field in fields if field in LISTING_FIELDS and field != "images"],
+    )
+    if "images" in fields:
+        data["images"] = [
+            serialize_image(gallery_image.image.get_rendition(DETAIL_RENDITION))
+            for gallery_image in product.get_gallery_images()
+        ]
+    for field in ("energy_value", "shelf_life", "composition", "storage_conditions"):
+        if field in fields:
+            data[field] = str(getattr(product, field))
+    return data
+
+
+def cached_json(key, build):
+    """Return a JSON response from the catalog cache, building it on a miss."""
+    content = cache.get(key)
+    if content is None:
+        content = dumps(build())
+        cache.set(key, content, CATALOG_CACHE_TIMEOUT)
+    return HttpResponse(content, content_type="application/json")
+
+
+def cart_etag(request, *args, **kwargs):  # pylint: disable=unused-argument
+    """Return the ETag of the cart state, derived from cart and catalog versions."""
+    return make_etag(
+        "cart-json",
+        get_cart_version(request),
+        get_catalog_version(),
+        translation.get_language(),
+    )
+
+
+@router.get("/products/")
+def list_products(  # noqa: PLR0913
+    request,
+    taste: list[str] = Query([]),  # noqa: B008
+    weight: list[str] = Query([]),  # noqa: B008
+    price_min: str | None = None,
+    price_max: str | None = None,
+    sort: str = "default",
+    cursor: str | None = None,
+    limit: int = DEFAULT_LIMIT,
+    fields: str | None = None,
+):
+    """Return one page of catalog cards and the cursor of the next page.
+
+    Accepts the same filters as the HTML catalog. ``fields`` selects a
+    comma-separated subset of the card fields.
+    """
+    taste_ids = parse_id_list(taste)
+    weight_ids = parse_id_list(weight)
+    min_price = parse_price(price_min)
+    max_price = parse_price(price_max)
+    sort = sort if sort in CATALOG_ORDERINGS else "default"
+    limit = min(max(limit, 1), MAX_LIMIT)
+    selected = parse_fields(fields, LISTING_FIELDS)
+
+    key = catalog_cache_key(
+        "api:products",
+        ",".join(map(str, taste_ids)),
+        ",".join(map(str, weight_ids)),
+        "" if min_price is None else min_price,
+        "" if max_price is None else max_price,
+        sort,
+        cursor or "",
+        limit,
+        ",".join(selected),
+    )
+
+    def build():
+        if settings.SHOP_CATALOG_READ_MODEL:
+            products = ProductListing.objects.all()
+        else:
+            products = Product.objects.filter(live=True).for_listing()
+        products = products.filter_catalog(
+            taste_ids,
+            weight_ids,
+            new_only=sort == "new",
+            min_price=min_price,
+            max_price=max_price,
+        )
+        page = KeysetPaginator(products, limit, CATALOG_ORDERINGS[sort]).page(cursor)
+        return {
+            "items": [serialize_card(product, selected) for product in page],
+            "next_cursor": page.next_cursor,
+        }
+
+    return cached_json(key, build)
+
+
+@router.get("/products/{product_id}/")
+def get_product(request, product_id: int, fields: str | None = None):
+    """Return the details of a single live product."""
+    selected = parse_fields(fields, DETAIL_FIELDS)
+    key = catalog_cache_key("api:product", product_id, ",".join(selected))
+
+    def build():
+        products = Product.objects.all()
+        if "images" in selected:
+            products = products.with_related(DETAIL_RENDITION)
+        product = get_object_or_404(products, id=product_id, live=True)
+        return serialize_product(product, selected)
+
+    return cached_json(key, build)
+
+
+@router.get("/facets/")
+def get_facets(  # noqa: PLR0913
+    request,
+    taste: list[str] = Query([]),  # noqa: B008
+    weight: list[str] = Query([]),  # noqa: B008
+    price_min: str | None = None,
+    price_max: str | None = None,
+    sort: str = "default",
+):
+    """Return taste/weight facet counts and the price histogram."""
+    taste_ids = parse_id_list(taste)
+    weight_ids = parse_id_list(weight)
+    new_only = sort == "new"
+    facets = get_catalog_facets(
+        taste_ids,
+        weight_ids,
+        new_only=new_only,
+        min_price=parse_price(price_min),
+        max_price=parse_price(price_max),
+    )
+    return {
+        **facets,
+        "price": get_price_histogram(taste_ids, weight_ids, new_only=new_only),
+    }
+
+
+@router.get("/cart/")
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=cart_etag)
+def get_cart(request):
+    """Return the items and totals of the visitor's cart."""
+    summary = carts.get_cart(request).get_summary()
+    items = [
+        {
+            "id": item.id,
+            "product_id": item.product.id,
+            "title": str(item.product.title),
+            "slug": item.product.slug,
+            "price": serialize_price(item.product.price),
+            "quantity": item.quantity,
+            "cost": serialize_price(item.cost),
+        }
+        for item in summary.lines
+    ]
+    data = {
+        "items": items,
+        "total_items": summary.total_items,
+        "total_price": serialize_price(summary.total_price),
+    }
+    return HttpResponse(dumps(data), content_type="application/json")
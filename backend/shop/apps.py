@@ -1,5 +1,7 @@
 """shop/apps.py."""
 
+from importlib import import_module
+
 from django.apps import AppConfig
 
 
@@ -7,3 +9,7 @@ class ShopConfig(AppConfig):
     """Configuration for the shop application."""
 
     name = "shop"
+
+    def ready(self):
+        """Connect the shop signal handlers."""
+        import_module(f"{self.name}.signals")
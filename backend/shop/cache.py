@@ -0,0 +1,238 @@
+"""shop/cache.py."""
+
+import hashlib
+import logging
+import time
+
+from django.core.cache import cache
+from django.utils import translation
+from django.utils.http import quote_etag
+
+from .warmup import schedule_catalog_warmup
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION_KEY = "shop:catalog:version"
+CATALOG_CACHE_TIMEOUT = 60 * 60 * 24
+CART_VERSION_KEY_PREFIX = "shop:cart:version"
+PRODUCT_PAGE_VERSION_KEY = "shop:product-page:version"
+PRODUCT_VERSION_KEY_PREFIX = "shop:product:version"
+
+
+def get_catalog_version():
+    """Return the current catalog version.
+
+    The version is part of every catalog cache key, so bumping it invalidates
+    all cached catalog data at once without deleting individual keys.
+    """
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, int(time.time()), timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    """Increment the catalog version, invalidating all cached catalog data.
+
+    A cache warmup run is scheduled to render the hot pages of the new version.
+    """
+    try:
+        version = cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        version = int(time.time())
+        cache.set(CATALOG_VERSION_KEY, version, timeout=None)
+    logger.debug("Catalog cache version bumped to %s", version)
+    schedule_catalog_warmup()
+    return version
+
+
+def catalog_cache_key(prefix, *parts):
+    """Build a versioned, locale-aware cache key for catalog data."""
+    return ":".join(
+        [
+            "shop",
+            prefix,
+            str(get_catalog_version()),
+            translation.get_language() or "",
+            *(str(part) for part in parts),
+        ]
+    )
+
+
+CATALOG_PAGE_KEY_PREFIX = "shop:page"
+CSRF_TOKEN_PLACEHOLDER = "shop-catalog-csrf-token"  # noqa: S105
+
+
+def catalog_page_cache_key(*parts):
+    """Build a locale-aware key for a cached catalog response.
+
+    Unlike ``catalog_cache_key`` the version is not part of the key. It is
+    stored next to the content instead, so a lookup reads the entry and the
+    current version with a single ``MGET``.
+    """
+    return ":".join(
+        [
+            CATALOG_PAGE_KEY_PREFIX,
+            translation.get_language() or "",
+            *(str(part) for part in parts),
+        ]
+    )
+
+
+def get_cached_catalog_page(key):
+    """Return ``(content, version)`` for a cached catalog response.
+
+    ``content`` is ``None`` when the entry is missing or was rendered for an
+    older catalog version. ``version`` is the current catalog version, to be
+    stored with a freshly rendered response.
+    """
+    values = cache.get_many([CATALOG_VERSION_KEY, key])
+    version = values.get(CATALOG_VERSION_KEY)
+    if version is None:
+        return None, get_catalog_version()
+
+    entry = values.get(key)
+    if entry is None or entry[0] != version:
+        return None, version
+    return entry[1], version
+
+
+def set_cached_catalog_page(key, version, content):
+    """Store a rendered catalog response for the given catalog version."""
+    cache.set(key, (version, content), CATALOG_CACHE_TIMEOUT)
+
+
+def _cart_version_key(owner):
+    """Return the cache key holding the version of a cart owner's cart."""
+    return f"{CART_VERSION_KEY_PREFIX}:{owner}"
+
+
+def get_cart_owner(request):
+    """Identify whose cart a request reads without querying the database.
+
+    Returns None for an anonymous visitor without a session yet.
+    """
+    if request.user.is_authenticated:
+        return f"user:{request.user.pk}"
+    if request.session.session_key:
+        return f"session:{request.session.session_key}"
+    return None
+
+
+def get_product_page_version():
+    """Return the version of the published ProductPage content."""
+    version = cache.get(PRODUCT_PAGE_VERSION_KEY)
+    if version is None:
+        cache.add(PRODUCT_PAGE_VERSION_KEY, int(time.time()), timeout=None)
+        version = cache.get(PRODUCT_PAGE_VERSION_KEY)
+    return version
+
+
+def bump_product_page_version():
+    """Increment the ProductPage version, dropping its cached template data."""
+    try:
+        version = cache.incr(PRODUCT_PAGE_VERSION_KEY)
+    except ValueError:
+        version = int(time.time())
+        cache.set(PRODUCT_PAGE_VERSION_KEY, version, timeout=None)
+    logger.debug("Product page cache version bumped to %s", version)
+    return version
+
+
+def product_page_cache_key():
+    """Build the locale-aware key of the cached ProductPage and its blocks."""
+    return ":".join(
+        [
+            "shop",
+            "product-page",
+            str(get_product_page_version()),
+            translation.get_language() or "",
+        ]
+    )
+
+
+def _product_version_key(product_id):
+    """Return the cache key holding the version of a single product."""
+    return f"{PRODUCT_VERSION_KEY_PREFIX}:{product_id}"
+
+
+def get_product_version(product_id):
+    """Return the version of a product's detail page data."""
+    key = _product_version_key(product_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time()), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_product_versions(product_ids):
+    """Increment the versions of products, dropping their cached detail pages."""
+    for product_id in product_ids:
+        key = _product_version_key(product_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, int(time.time()), timeout=None)
+    logger.debug("Product cache versions bumped for %s", product_ids)
+
+
+def product_detail_cache_key(product_id):
+    """Build the locale-aware key of a cached product detail response."""
+    return catalog_page_cache_key("product", product_id)
+
+
+def get_cached_product_detail(key, product_id):
+    """Return ``(content, version)`` for a cached product detail response.
+
+    The version pairs the product version with the ProductPage version, so
+    the entry goes stale when either the product (or anything shown with it)
+    or the shared page blocks change. Both are read with the entry in a
+    single ``MGET``.
+    """
+    version_keys = [_product_version_key(product_id), PRODUCT_PAGE_VERSION_KEY]
+    values = cache.get_many([*version_keys, key])
+    version = tuple(values.get(version_key) for version_key in version_keys)
+    if None in version:
+        return None, (get_product_version(product_id), get_product_page_version())
+
+    entry = values.get(key)
+    if entry is None or entry[0] != version:
+        return None, version
+    return entry[1], version
+
+
+def get_cart_version(request):
+    """Return the version of the requesting visitor's cart.
+
+    A visitor without a session has no cart yet, so all of them share the
+    version 0 of the empty cart.
+    """
+    owner = get_cart_owner(request)
+    if owner is None:
+        return 0
+    key = _cart_version_key(owner)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time()), timeout=CATALOG_CACHE_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+def bump_cart_version(cart):
+    """Increment the version of a cart, invalidating its fragment ETags."""
+    owner = f"user:{cart.user_id}" if cart.user_id else f"session:{cart.session_key}"
+    key = _cart_version_key(owner)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time()), timeout=CATALOG_CACHE_TIMEOUT)
+
+
+def make_etag(*parts):
+    """Build a strong ETag from version numbers and other key parts."""
+    digest = hashlib.blake2b(
+        ":".join(str(part) for part in parts).encode(), digest_size=16
+    ).hexdigest()
+    return quote_etag(digest)
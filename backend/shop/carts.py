@@ -0,0 +1,565 @@
+"""shop/carts.py."""
+
+import logging
+import uuid
+from functools import partial
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Sum, Window
+from django.http import Http404
+from django.utils.module_loading import import_string
+from django_redis import get_redis_connection
+from redis.exceptions import WatchError
+
+from .cache import bump_cart_version
+from .models import Cart, CartItem, Product
+from .models.ecommerce import get_or_create_cart
+
+# pylint: disable=no-member, too-many-arguments
+
+logger = logging.getLogger(__name__)
+
+SESSION_CART_KEY = "shop_cart"
+# Session key of an anonymous visitor's database cart, kept across login.
+SESSION_CART_ID_KEY = "shop_cart_id"
+REDIS_CART_KEY_PREFIX = "shop:cart:items"
+ITEM_FIELD_PREFIX = "item:"
+COUNT_FIELD = "count"
+TOTAL_FIELD = "total"
+# Upper bound of a line quantity, far below the limit of the integer column.
+MAX_LINE_QUANTITY = 9999
+
+# Inserts cart lines, or adds to the quantity of lines that already exist.
+UPSERT_SQL = """
+    INSERT INTO {item} (cart_id, product_id, quantity)
+    VALUES {rows}
+    ON CONFLICT (cart_id, product_id)
+    DO UPDATE SET quantity = LEAST({item}.quantity + EXCLUDED.quantity, {max_quantity})
+"""
+DELETE_SQL = "DELETE FROM {item} WHERE id = %s AND cart_id = %s"
+# Changes the quantity of one line, or deletes the line when the quantity
+# would drop to zero or below. Returns the numbers of updated and deleted rows.
+CHANGE_SQL = """
+    WITH deleted AS (
+        DELETE FROM {item}
+        WHERE id = %(id)s AND cart_id = %(cart)s AND quantity + %(delta)s <= 0
+        RETURNING id
+    ), updated AS (
+        UPDATE {item}
+        SET quantity = LEAST(quantity + %(delta)s, {max_quantity})
+        WHERE id = %(id)s AND cart_id = %(cart)s AND quantity + %(delta)s > 0
+        RETURNING id
+    )
+    SELECT (SELECT COUNT(*) FROM updated), (SELECT COUNT(*) FROM deleted)
+"""
+# Applies a batch of (line id, quantity delta, remove) changes to a cart.
+# Lines going to zero or below are left at zero for DELETE_EMPTY_SQL.
+BATCH_UPDATE_SQL = """
+    UPDATE {item} AS item
+    SET quantity = CASE
+        WHEN change.remove THEN 0
+        ELSE LEAST(GREATEST(item.quantity + change.delta, 0), {max_quantity})
+    END
+    FROM (VALUES {rows}) AS change (id, delta, remove)
+    WHERE item.id = change.id AND item.cart_id = %s
+"""
+DELETE_EMPTY_SQL = "DELETE FROM {item} WHERE cart_id = %s AND quantity = 0"
+
+# Changes the quantity of one line and the running count and total of the
+# cart in one atomic step, and refreshes the TTL of the hash.
+# KEYS[1]: cart hash; ARGV: item field, quantity delta or "remove", unit
+# price, TTL in seconds, "1" if the line must already be in the cart, and the
+# maximum quantity of a line.
+# Returns the new quantity, or -1 if the line is not in the cart.
+CHANGE_SCRIPT = """
+local current = tonumber(redis.call('HGET', KEYS[1], ARGV[1]) or '0')
+if current == 0 and ARGV[5] == '1' then
+    return -1
+end
+local quantity = current
+if ARGV[2] == 'remove' then
+    quantity = 0
+else
+    quantity = math.min(math.max(current + tonumber(ARGV[2]), 0), tonumber(ARGV[6]))
+end
+if quantity == 0 then
+    redis.call('HDEL', KEYS[1], ARGV[1])
+else
+    redis.call('HSET', KEYS[1], ARGV[1], quantity)
+end
+redis.call('HINCRBY', KEYS[1], 'count', quantity - current)
+redis.call('HINCRBY', KEYS[1], 'total', (quantity - current) * tonumber(ARGV[3]))
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return quantity
+"""
+
+
+def _table(model):
+    """Return the quoted database table name of a model."""
+    return connection.ops.quote_name(model._meta.db_table)  # noqa: SLF001
+
+
+class _Frozen:
+    """Base of read-only value objects: attributes are set once in __init__."""
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        """Refuse to change an attribute."""
+        msg = f"{type(self).__name__} is immutable"
+        raise AttributeError(msg)
+
+    def _set(self, **values):
+        """Set the attributes of a new instance."""
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+
+class CartLine(_Frozen):
+    """A product, its quantity and the line cost, as rendered by the templates."""
+
+    __slots__ = ("cost", "id", "product", "quantity")
+
+    def __init__(self, item_id, product, quantity, cost=None):
+        """Store the id used in cart item URLs, the product and the quantity.
+
+        The cost is computed from the product price unless it is given.
+        """
+        if cost is None:
+            cost = product.price * quantity
+        self._set(id=item_id, product=product, quantity=quantity, cost=cost)
+
+
+class CartSummary(_Frozen):
+    """An immutable snapshot of a cart's lines, item count and total price.
+
+    It is built once per request, and every fragment of a cart response is
+    rendered from it, so they show the same state without further queries.
+    """
+
+    __slots__ = ("lines", "total_items", "total_price")
+
+    def __init__(self, lines, total_items, total_price):
+        """Store the lines and the totals."""
+        self._set(lines=tuple(lines), total_items=total_items, total_price=total_price)
+
+
+class DatabaseCart:
+    """Cart backend reading and writing ``Cart`` and ``CartItem`` rows."""
+
+    def __init__(self, cart):
+        """Wrap a Cart instance."""
+        self.cart = cart
+
+    @classmethod
+    def for_request(cls, request):
+        """Return the database cart of the requesting visitor.
+
+        An anonymous cart is found by the session key, which changes on
+        login, so its id is kept in the session for ``for_session``.
+        """
+        cart = get_or_create_cart(request)
+        if cart.user_id is None and request.session.get(SESSION_CART_ID_KEY) != cart.id:
+            request.session[SESSION_CART_ID_KEY] = cart.id
+        return cls(cart)
+
+    @classmethod
+    def for_session(cls, request):
+        """Return the cart the session was using before login, or None."""
+        cart_id = request.session.pop(SESSION_CART_ID_KEY, None)
+        if cart_id is None:
+            return None
+        cart = Cart.objects.filter(pk=cart_id, user__isnull=True).first()
+        return cls(cart) if cart else None
+
+    def get_summary(self):
+        """Return the lines and totals of the cart from a single query.
+
+        The count and the total are window aggregates over the cart's rows,
+        so they come back on every line along with its product.
+        """
+        items = (
+            self.cart.items.select_related("product")
+            .annotate(
+                cost=F("quantity") * F("product__price"),
+                cart_items=Window(Sum("quantity")),
+                cart_total=Window(Sum("cost")),
+            )
+            .order_by("pk")
+        )
+        lines = []
+        total_items = total_price = 0
+        for item in items:
+            lines.append(CartLine(item.id, item.product, item.quantity, item.cost))
+            total_items, total_price = item.cart_items, item.cart_total
+        return CartSummary(lines, total_items, total_price)
+
+    def get_total_items(self):
+        """Return the number of items in the cart."""
+        return self.cart.items.aggregate(total=Sum("quantity"))["total"] or 0
+
+    def _changed(self):
+        """Bump the cart version once the surrounding transaction commits.
+
+        Single-statement writes bypass the CartItem signals, so the ETags of
+        the cart fragments are invalidated here.
+        """
+        transaction.on_commit(partial(bump_cart_version, self.cart))
+
+    def add_quantities(self, quantities):
+        """Add quantities by product id to the cart in a single upsert.
+
+        Each product's line is inserted, or its quantity increased when the
+        line exists, atomically in the database, so concurrent clicks never
+        create duplicate lines or lose an increment.
+        """
+        if not quantities:
+            return
+        rows = ", ".join(["(%s, %s, %s)"] * len(quantities))
+        params = []
+        for product_id, quantity in quantities.items():
+            params.extend([self.cart.id, product_id, quantity])
+        with connection.cursor() as cursor:
+            cursor.execute(
+                UPSERT_SQL.format(
+                    item=_table(CartItem), rows=rows, max_quantity=MAX_LINE_QUANTITY
+                ),
+                params,
+            )
+        self._changed()
+
+    def add(self, product, quantity):
+        """Add a quantity of a product to the cart."""
+        self.add_quantities({product.id: quantity})
+        logger.info(
+            "Added %s x '%s' (ID: %s) to Cart ID: %s",
+            quantity,
+            product.title,
+            product.id,
+            self.cart.id,
+        )
+
+    def change(self, item_id, delta):
+        """Change the quantity of a line, removing it when it drops to zero.
+
+        A single statement updates the line, or deletes it when the new
+        quantity would not be positive. Raises Http404 when the line is not
+        in the cart.
+        """
+        sql = CHANGE_SQL.format(item=_table(CartItem), max_quantity=MAX_LINE_QUANTITY)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, {"id": item_id, "cart": self.cart.id, "delta": delta})
+            updated, deleted = cursor.fetchone()
+        if not (updated or deleted):
+            raise Http404
+        self._changed()
+        if deleted:
+            logger.info("Removed CartItem ID: %s because quantity reached 0", item_id)
+        else:
+            logger.debug("Changed quantity by %s for CartItem ID: %s", delta, item_id)
+
+    def apply_changes(self, changes):
+        """Apply many line changes in one transaction.
+
+        ``changes`` maps line ids to a quantity delta, or to None to remove
+        the line. A single bulk UPDATE applies every change, then a single
+        DELETE drops the lines that reached zero. Unknown lines are ignored.
+        """
+        if not changes:
+            return
+        rows = ", ".join(["(%s, %s, %s)"] * len(changes))
+        params = []
+        for item_id, delta in changes.items():
+            params.extend([item_id, delta or 0, delta is None])
+        table = _table(CartItem)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                BATCH_UPDATE_SQL.format(
+                    item=table, rows=rows, max_quantity=MAX_LINE_QUANTITY
+                ),
+                [*params, self.cart.id],
+            )
+            cursor.execute(DELETE_EMPTY_SQL.format(item=table), [self.cart.id])
+            self._changed()
+        logger.info(
+            "Applied %s line changes to Cart ID: %s", len(changes), self.cart.id
+        )
+
+    def remove(self, item_id):
+        """Remove a line from the cart. Raises Http404 when it is not there."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                DELETE_SQL.format(item=_table(CartItem)), [item_id, self.cart.id]
+            )
+            deleted = cursor.rowcount > 0
+        if not deleted:
+            raise Http404
+        self._changed()
+        logger.info(
+            "Manually removed CartItem ID: %s from Cart ID: %s", item_id, self.cart.id
+        )
+
+    def persist(self, user=None):
+        """Return the Cart, which is already stored in the database.
+
+        When a user is given (on login), the lines are moved into the user's
+        cart, which is returned instead.
+        """
+        if user is None or self.cart.user_id == user.pk:
+            return self.cart
+        quantities = dict(self.cart.items.values_list("product_id", "quantity"))
+        with transaction.atomic():
+            cart, _created = Cart.objects.get_or_create(user=user)
+            DatabaseCart(cart).add_quantities(quantities)
+            logger.info("Merged Cart ID: %s into Cart ID: %s", self.cart.id, cart.id)
+            self.cart.delete()
+        return cart
+
+
+class RedisCart:
+    """Cart backend keeping an anonymous visitor's cart in a Redis hash.
+
+    The hash maps products to quantities and keeps a running item count and
+    total price, so the header counter is served without a database query.
+    It expires with the session cookie. Nothing is written to the database
+    until the visitor logs in or checks out (see ``persist``).
+
+    The hash is named after a random token stored in the session rather than
+    the session key, which changes on login. Line ids are product ids.
+    """
+
+    user_id = None
+
+    def __init__(self, request):
+        """Bind the cart to the requesting visitor's session."""
+        self.session = request.session
+        self.redis = get_redis_connection("default")
+
+    @classmethod
+    def for_request(cls, request):
+        """Return the Redis cart of the requesting visitor."""
+        return cls(request)
+
+    @classmethod
+    def for_session(cls, request):
+        """Return the cart the session was using before login, or None."""
+        return cls(request) if request.session.get(SESSION_CART_KEY) else None
+
+    @property
+    def session_key(self):
+        """Return the session key, which identifies the cart's ETag version."""
+        return self.session.session_key
+
+    @property
+    def key(self):
+        """Return the Redis key of the cart, or None if nothing was added yet."""
+        token = self.session.get(SESSION_CART_KEY)
+        return f"{REDIS_CART_KEY_PREFIX}:{token}" if token else None
+
+    def _read(self, client=None):
+        """Return the stored quantities by product id, the count and the total."""
+        client = client or self.redis
+        data = client.hgetall(self.key) if self.key else {}
+        quantities = {}
+        for field, value in data.items():
+            name = field.decode()
+            if name.startswith(ITEM_FIELD_PREFIX):
+                quantities[int(name.removeprefix(ITEM_FIELD_PREFIX))] = int(value)
+        count = int(data.get(COUNT_FIELD.encode(), 0))
+        total = int(data.get(TOTAL_FIELD.encode(), 0))
+        return quantities, count, total
+
+    def get_summary(self):
+        """Return the lines and totals of the cart.
+
+        Lines of deleted products are dropped, and the stored count and total
+        are corrected when prices changed since the products were added. The
+        hash is watched while it is read, so a correction is skipped when a
+        concurrent change lands first; the next summary corrects it instead.
+        """
+        with self.redis.pipeline() as pipeline:
+            if self.key:
+                pipeline.watch(self.key)
+            quantities, count, total = self._read(pipeline)
+            products = Product.objects.in_bulk(quantities)
+            lines = [
+                CartLine(product_id, products[product_id], quantity)
+                for product_id, quantity in sorted(quantities.items())
+                if product_id in products
+            ]
+
+            actual_count = sum(line.quantity for line in lines)
+            actual_total = sum(int(line.cost) for line in lines)
+            if (actual_count, actual_total) != (count, total) or len(lines) != len(
+                quantities
+            ):
+                pipeline.multi()
+                for product_id in quantities.keys() - products.keys():
+                    pipeline.hdel(self.key, f"{ITEM_FIELD_PREFIX}{product_id}")
+                pipeline.hset(
+                    self.key,
+                    mapping={COUNT_FIELD: actual_count, TOTAL_FIELD: actual_total},
+                )
+                try:
+                    pipeline.execute()
+                except WatchError:
+                    logger.debug("Session cart changed while being corrected")
+        return CartSummary(lines, actual_count, actual_total)
+
+    def get_total_items(self):
+        """Return the number of items in the cart from the running count."""
+        return int(self.redis.hget(self.key, COUNT_FIELD) or 0) if self.key else 0
+
+    def _get_key(self):
+        """Return the Redis key of the cart, creating the session and token."""
+        if not self.session.session_key:
+            self.session.create()
+        token = self.session.setdefault(SESSION_CART_KEY, uuid.uuid4().hex)
+        return f"{REDIS_CART_KEY_PREFIX}:{token}"
+
+    def _run_change(  # noqa: PLR0913
+        self, key, product_id, delta, price, *, must_exist, client=None
+    ):
+        """Queue or run the change script on one line of the cart."""
+        script = self.redis.register_script(CHANGE_SCRIPT)
+        return script(
+            keys=[key],
+            args=[
+                f"{ITEM_FIELD_PREFIX}{product_id}",
+                delta,
+                int(price),
+                settings.SESSION_COOKIE_AGE,
+                int(must_exist),
+                MAX_LINE_QUANTITY,
+            ],
+            client=client,
+        )
+
+    def _change(self, product_id, delta, price, *, must_exist):
+        """Run the change script on one line and bump the cart version.
+
+        Only additions create the session and the cart token; a line that
+        must exist is looked up without them.
+        """
+        key = self.key if must_exist else self._get_key()
+        if key is None:
+            raise Http404
+        quantity = self._run_change(
+            key, product_id, delta, price, must_exist=must_exist
+        )
+        if quantity < 0:
+            raise Http404
+        bump_cart_version(self)
+        return quantity
+
+    def _get_price(self, product_id):
+        """Return the price of a product in the cart. Raises Http404 if missing."""
+        price = (
+            Product.objects.filter(pk=product_id)
+            .values_list("price", flat=True)
+            .first()
+        )
+        if price is None:
+            raise Http404
+        return price
+
+    def add(self, product, quantity):
+        """Add a quantity of a product to the cart."""
+        self._change(product.pk, quantity, product.price, must_exist=False)
+        logger.info("Added product ID %s to a session cart", product.pk)
+
+    def change(self, item_id, delta):
+        """Change the quantity of a line, removing it when it drops to zero.
+
+        Raises Http404 when the line is not in the cart.
+        """
+        price = self._get_price(item_id)
+        self._change(item_id, delta, price, must_exist=True)
+
+    def remove(self, item_id):
+        """Remove a line from the cart. Raises Http404 when it is not there."""
+        price = self._get_price(item_id)
+        self._change(item_id, "remove", price, must_exist=True)
+
+    def apply_changes(self, changes):
+        """Apply many line changes in one atomic Redis transaction.
+
+        ``changes`` maps line ids to a quantity delta, or to None to remove
+        the line. The prices are read with one query and the change scripts
+        run in a single MULTI pipeline. Unknown lines are ignored.
+        """
+        key = self.key
+        if key is None:
+            return
+        prices = dict(Product.objects.filter(pk__in=changes).values_list("pk", "price"))
+        if not prices:
+            return
+        pipeline = self.redis.pipeline()
+        for product_id, price in prices.items():
+            delta = changes[product_id]
+            self._run_change(
+                key,
+                product_id,
+                "remove" if delta is None else delta,
+                price,
+                must_exist=True,
+                client=pipeline,
+            )
+        pipeline.execute()
+        bump_cart_version(self)
+
+    def persist(self, user=None):
+        """Store the cart in ``Cart``/``CartItem`` rows and return the Cart.
+
+        The lines are added to the user's cart when a user is given (on
+        login) and to a session cart otherwise (on checkout). The Redis hash
+        is dropped once the surrounding transaction commits.
+        """
+        quantities, _count, _total = self._read()
+        with transaction.atomic():
+            if user is not None:
+                cart, _created = Cart.objects.get_or_create(user=user)
+            else:
+                cart, _created = Cart.objects.get_or_create(
+                    session_key=self.session_key, user__isnull=True
+                )
+            existing = Product.objects.filter(pk__in=quantities).values_list(
+                "pk", flat=True
+            )
+            DatabaseCart(cart).add_quantities(
+                {product_id: quantities[product_id] for product_id in existing}
+            )
+            transaction.on_commit(self.clear)
+        logger.info("Persisted a session cart to Cart ID: %s", cart.id)
+        return cart
+
+    def clear(self):
+        """Delete the Redis hash of the cart and forget its token."""
+        if self.key:
+            self.redis.delete(self.key)
+            self.session.pop(SESSION_CART_KEY, None)
+            bump_cart_version(self)
+
+
+def get_cart(request):
+    """Return the cart backend of the requesting visitor.
+
+    Authenticated users keep their cart in the database. Anonymous visitors
+    use the backend named by ``settings.SHOP_ANONYMOUS_CART_BACKEND``.
+    """
+    if request.user.is_authenticated:
+        return DatabaseCart.for_request(request)
+    backend = import_string(settings.SHOP_ANONYMOUS_CART_BACKEND)
+    return backend.for_request(request)
+
+
+def persist_session_cart(request, user):
+    """Move the cart a visitor filled before logging in into the user's cart.
+
+    The cart is looked up with ``settings.SHOP_ANONYMOUS_CART_BACKEND``.
+    """
+    backend = import_string(settings.SHOP_ANONYMOUS_CART_BACKEND)
+    cart = backend.for_session(request)
+    if cart is not None:
+        cart.persist(user)
@@ -0,0 +1,164 @@
+"""shop/facets.py."""
+
+import logging
+import math
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db.models import Count, F, Max, Min, Q
+from django.db.models.functions import Floor
+
+from .cache import CATALOG_CACHE_TIMEOUT, catalog_cache_key
+from .models.snippets import ProductTaste, ProductWeight
+
+# pylint: disable=no-member
+
+logger = logging.getLogger(__name__)
+
+PRICE_HISTOGRAM_BUCKETS = 10
+
+
+def _compute_facets(taste_ids, weight_ids, new_only, min_price, max_price):
+    """Count matching products per taste and per weight in one aggregate query.
+
+    Each facet is counted against the other active filter only, so a shopper
+    sees how many products a click on that option would return. Tastes are
+    matched on the ``taste_ids`` array, so the query has no join to count
+    distinct rows over.
+    """
+    tastes = list(ProductTaste.objects.all())
+    weights = list(ProductWeight.objects.all())
+
+    taste_filter = Q(taste_ids__overlap=list(taste_ids)) if taste_ids else Q()
+    weight_filter = Q(weight_option_id__in=weight_ids) if weight_ids else Q()
+
+    aggregates = {}
+    for taste in tastes:
+        aggregates[f"taste_{taste.id}"] = Count(
+            "id", filter=Q(taste_ids__contains=[taste.id]) & weight_filter
+        )
+    for weight in weights:
+        aggregates[f"weight_{weight.id}"] = Count(
+            "id", filter=Q(weight_option_id=weight.id) & taste_filter
+        )
+
+    counts = {}
+    if aggregates:
+        # Resolve Cyclic Import: shop.models.products imports this module.
+        product_model = apps.get_model("shop", "Product")
+        products = product_model.objects.filter(live=True).filter_catalog(
+            new_only=new_only, min_price=min_price, max_price=max_price
+        )
+        counts = products.aggregate(**aggregates)
+
+    return {
+        "tastes": [
+            {
+                "id": taste.id,
+                "name": str(taste.name),
+                "count": counts.get(f"taste_{taste.id}", 0),
+            }
+            for taste in tastes
+        ],
+        "weights": [
+            {
+                "id": weight.id,
+                "name": str(weight.name),
+                "count": counts.get(f"weight_{weight.id}", 0),
+            }
+            for weight in weights
+        ],
+    }
+
+
+def get_catalog_facets(
+    taste_ids=(), weight_ids=(), *, new_only=False, min_price=None, max_price=None
+):
+    """Return taste and weight facets with product counts for a filter state.
+
+    Results are cached per filter combination and locale; the cache key is
+    versioned by the catalog version, which is bumped whenever a product or
+    one of its snippets changes.
+    """
+    taste_ids = sorted(set(taste_ids))
+    weight_ids = sorted(set(weight_ids))
+    key = catalog_cache_key(
+        "facets",
+        ",".join(map(str, taste_ids)),
+        ",".join(map(str, weight_ids)),
+        int(new_only),
+        "" if min_price is None else min_price,
+        "" if max_price is None else max_price,
+    )
+    facets = cache.get(key)
+    if facets is None:
+        facets = _compute_facets(taste_ids, weight_ids, new_only, min_price, max_price)
+        cache.set(key, facets, CATALOG_CACHE_TIMEOUT)
+        logger.debug("Catalog facets computed and cached under %s", key)
+    return facets
+
+
+def _compute_price_histogram(taste_ids, weight_ids, new_only, buckets):
+    """Bucket the prices of the matching products into equal-width ranges.
+
+    The bounds come from one MIN/MAX aggregate and the counts from one
+    grouped query; both are served by the ``(live, price)`` index when no
+    other filter is active.
+    """
+    product_model = apps.get_model("shop", "Product")
+    products = product_model.objects.filter(live=True).filter_catalog(
+        taste_ids, weight_ids, new_only=new_only
+    )
+    bounds = products.aggregate(low=Min("price"), high=Max("price"))
+    if bounds["low"] is None:
+        return {"min": None, "max": None, "buckets": []}
+
+    low, high = int(bounds["low"]), int(bounds["high"])
+    width = max(math.ceil((high - low + 1) / buckets), 1)
+    counts = dict(
+        products.annotate(bucket=Floor((F("price") - low) / width))
+        .values_list("bucket")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    counts = {int(bucket): count for bucket, count in counts.items()}
+
+    largest = max(counts.values())
+    histogram = []
+    for index in range(math.ceil((high - low + 1) / width)):
+        count = counts.get(index, 0)
+        histogram.append(
+            {
+                "from": low + index * width,
+                "to": min(low + (index + 1) * width - 1, high),
+                "count": count,
+                "height": round(count * 100 / largest),
+            }
+        )
+    return {"min": low, "max": high, "buckets": histogram}
+
+
+def get_price_histogram(
+    taste_ids=(), weight_ids=(), *, new_only=False, buckets=PRICE_HISTOGRAM_BUCKETS
+):
+    """Return the price bounds and histogram for a filter state.
+
+    The price range itself is not part of the state, so the slider keeps
+    showing the whole distribution while it is being dragged. Results are
+    cached until the catalog version changes.
+    """
+    taste_ids = sorted(set(taste_ids))
+    weight_ids = sorted(set(weight_ids))
+    key = catalog_cache_key(
+        "price_histogram",
+        ",".join(map(str, taste_ids)),
+        ",".join(map(str, weight_ids)),
+        int(new_only),
+        buckets,
+    )
+    histogram = cache.get(key)
+    if histogram is None:
+        histogram = _compute_price_histogram(taste_ids, weight_ids, new_only, buckets)
+        cache.set(key, histogram, CATALOG_CACHE_TIMEOUT)
+        logger.debug("Price histogram computed and cached under %s", key)
+    return histogram
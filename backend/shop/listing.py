@@ -0,0 +1,95 @@
+"""shop/listing.py."""
+
+import logging
+
+from django.conf import settings
+from django.utils import translation
+from modeltranslation.utils import build_localized_fieldname
+
+from .models import Product, ProductListing
+
+# pylint: disable=no-member
+
+logger = logging.getLogger(__name__)
+
+TRANSLATED_FIELDS = ("title", "slug", "taste_names", "weight_name", "packaging_name")
+
+
+def _localized_values(product):
+    """Collect the translatable card values of a product for one language."""
+    return {
+        "title": str(product.title),
+        "slug": product.slug,
+        "taste_names": product.get_tastes_display(),
+        "weight_name": product.get_weight_name(),
+        "packaging_name": product.get_packaging_name(),
+    }
+
+
+def _listing_values(product):
+    """Build the ProductListing field values for a product."""
+    values = {
+        "sku": product.sku,
+        "price": product.price,
+        "old_price": product.old_price,
+        "is_new": product.is_new,
+        "is_sale": product.is_sale,
+        "created_at": product.created_at,
+        "sales_rank": product.sales_rank,
+        "images": [
+            {
+                "url": rendition.url,
+                "width": rendition.width,
+                "height": rendition.height,
+                "alt": rendition.alt,
+            }
+            for rendition in product.get_card_images()
+        ],
+        "taste_ids": sorted(taste.id for taste in product.tastes.all()),
+        "weight_id": product.weight_option_id,
+        "weight_value": (
+            product.weight_option.value if product.weight_option else None
+        ),
+    }
+
+    with translation.override(settings.LANGUAGE_CODE):
+        values.update(_localized_values(product))
+
+    for lang_code, _name in settings.LANGUAGES:
+        with translation.override(lang_code):
+            localized = _localized_values(product)
+        for field in TRANSLATED_FIELDS:
+            values[build_localized_fieldname(field, lang_code)] = localized[field]
+
+    return values
+
+
+def rebuild_product_listings(product_ids):
+    """Rebuild (or remove) the catalog read-model rows for the given products.
+
+    Products that are no longer live, or no longer exist, lose their listing.
+    """
+    product_ids = set(product_ids)
+    if not product_ids:
+        return
+
+    products = Product.objects.filter(id__in=product_ids, live=True).for_listing()
+    rebuilt = set()
+    for product in products:
+        ProductListing.objects.update_or_create(
+            product=product, defaults=_listing_values(product)
+        )
+        rebuilt.add(product.id)
+
+    removed, _details = ProductListing.objects.filter(
+        product_id__in=product_ids - rebuilt
+    ).delete()
+    logger.debug("Product listings rebuilt: %d, removed: %d", len(rebuilt), removed)
+
+
+def rebuild_all_product_listings():
+    """Rebuild the whole catalog read model and drop rows of hidden products."""
+    product_ids = list(Product.objects.values_list("id", flat=True))
+    rebuild_product_listings(product_ids)
+    ProductListing.objects.exclude(product_id__in=product_ids).delete()
+    logger.info("Rebuilt catalog listings for %d products", len(product_ids))
@@ -0,0 +1 @@
+"""shop/management/__init__.py."""
@@ -0,0 +1 @@
+"""shop/management/commands/__init__.py."""
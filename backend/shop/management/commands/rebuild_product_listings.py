@@ -0,0 +1,18 @@
+"""shop/management/commands/rebuild_product_listings.py."""
+
+from django.core.management.base import BaseCommand
+
+from shop.cache import bump_catalog_version
+from shop.listing import rebuild_all_product_listings
+
+
+class Command(BaseCommand):
+    """Rebuild the denormalized catalog read model from the product tables."""
+
+    help = "Rebuild the ProductListing rows used by the catalog grid."
+
+    def handle(self, *args, **options):
+        """Rebuild every listing row and invalidate the cached catalog."""
+        rebuild_all_product_listings()
+        bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS("Product listings rebuilt."))
@@ -0,0 +1,81 @@
+"""shop/management/commands/shop_index_usage.py."""
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+TABLES_SQL = """
+    SELECT relname, seq_scan, seq_tup_read, COALESCE(idx_scan, 0), n_live_tup
+    FROM pg_stat_user_tables
+    WHERE relname LIKE %s
+    ORDER BY seq_scan DESC, relname
+"""
+
+INDEXES_SQL = """
+    SELECT s.relname, s.indexrelname, s.idx_scan, s.idx_tup_read,
+           pg_size_pretty(pg_relation_size(s.indexrelid))
+    FROM pg_stat_user_indexes s
+    WHERE s.relname LIKE %s
+    ORDER BY s.relname, s.idx_scan DESC, s.indexrelname
+"""
+
+
+class Command(BaseCommand):
+    """Report index usage and sequential scans for the shop tables."""
+
+    help = (
+        "Show pg_stat_user_tables and pg_stat_user_indexes statistics for the "
+        "shop tables, to confirm that hot queries stay on indexes."
+    )
+
+    def add_arguments(self, parser):
+        """Add the table prefix and the unused-only filter options."""
+        parser.add_argument(
+            "--prefix",
+            default="shop_",
+            help="Only report tables whose name starts with this prefix.",
+        )
+        parser.add_argument(
+            "--unused",
+            action="store_true",
+            help="Only list indexes that have never been scanned.",
+        )
+
+    def handle(self, *args, **options):
+        """Print the table and index statistics."""
+        if connection.vendor != "postgresql":
+            self.stderr.write(self.style.ERROR("This report requires PostgreSQL."))
+            return
+
+        pattern = f"{options['prefix']}%"
+        with connection.cursor() as cursor:
+            cursor.execute(TABLES_SQL, [pattern])
+            tables = cursor.fetchall()
+            cursor.execute(INDEXES_SQL, [pattern])
+            indexes = cursor.fetchall()
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Tables"))
+        self.stdout.write(
+            f"{'table':<40} {'seq_scan':>10} {'seq_tup_read':>14} "
+            f"{'idx_scan':>10} {'live_rows':>10}"
+        )
+        for name, seq_scan, seq_tup_read, idx_scan, live_rows in tables:
+            line = (
+                f"{name:<40} {seq_scan:>10} {seq_tup_read:>14} "
+                f"{idx_scan:>10} {live_rows:>10}"
+            )
+            # Tables read mostly sequentially despite having rows deserve a look.
+            if live_rows and seq_scan > idx_scan:
+                line = self.style.WARNING(line)
+            self.stdout.write(line)
+
+        self.stdout.write("")
+        self.stdout.write(self.style.MIGRATE_HEADING("Indexes"))
+        self.stdout.write(
+            f"{'table':<30} {'index':<45} {'idx_scan':>10} "
+            f"{'tup_read':>12} {'size':>10}"
+        )
+        for table, index, idx_scan, tup_read, size in indexes:
+            if options["unused"] and idx_scan:
+                continue
+            line = f"{table:<30} {index:<45} {idx_scan:>10} {tup_read:>12} {size:>10}"
+            self.stdout.write(self.style.WARNING(line) if not idx_scan else line)
@@ -0,0 +1,193 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:54
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("shop", "0027_productpackaging_name_en_productpackaging_name_ru_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductListing",
+            fields=[
+                (
+                    "product",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="listing",
+                        serialize=False,
+                        to="shop.product",
+                        verbose_name="Товар",
+                    ),
+                ),
+                (
+                    "title",
+                    models.CharField(max_length=255, verbose_name="Название товара"),
+                ),
+                (
+                    "title_ru",
+                    models.CharField(
+                        max_length=255, null=True, verbose_name="Название товара"
+                    ),
+                ),
+                (
+                    "title_uk",
+                    models.CharField(
+                        max_length=255, null=True, verbose_name="Название товара"
+                    ),
+                ),
+                (
+                    "title_en",
+                    models.CharField(
+                        max_length=255, null=True, verbose_name="Название товара"
+                    ),
+                ),
+                ("slug", models.CharField(max_length=255, verbose_name="URL (slug)")),
+                (
+                    "slug_ru",
+                    models.CharField(
+                        max_length=255, null=True, verbose_name="URL (slug)"
+                    ),
+                ),
+                (
+                    "slug_uk",
+                    models.CharField(
+                        max_length=255, null=True, verbose_name="URL (slug)"
+                    ),
+                ),
+                (
+                    "slug_en",
+                    models.CharField(
+                        max_length=255, null=True, verbose_name="URL (slug)"
+                    ),
+                ),
+                (
+                    "sku",
+                    models.CharField(blank=True, max_length=50, verbose_name="Артикул"),
+                ),
+                (
+                    "price",
+                    models.DecimalField(
+                        decimal_places=0, max_digits=10, verbose_name="Цена"
+                    ),
+                ),
+                (
+                    "old_price",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=0,
+                        max_digits=10,
+                        null=True,
+                        verbose_name="Старая цена",
+                    ),
+                ),
+                ("is_new", models.BooleanField(default=False, verbose_name="Новинка")),
+                ("is_sale", models.BooleanField(default=False, verbose_name="Акция")),
+                ("created_at", models.DateTimeField(verbose_name="Создан")),
+                (
+                    "images",
+                    models.JSONField(
+                        blank=True, default=list, verbose_name="Изображения"
+                    ),
+                ),
+                (
+                    "taste_ids",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.IntegerField(), blank=True, default=list
+                    ),
+                ),
+                ("taste_names", models.TextField(blank=True, verbose_name="Вкусы")),
+                (
+                    "taste_names_ru",
+                    models.TextField(blank=True, null=True, verbose_name="Вкусы"),
+                ),
+                (
+                    "taste_names_uk",
+                    models.TextField(blank=True, null=True, verbose_name="Вкусы"),
+                ),
+                (
+                    "taste_names_en",
+                    models.TextField(blank=True, null=True, verbose_name="Вкусы"),
+                ),
+                (
+                    "weight_id",
+                    models.IntegerField(blank=True, null=True, verbose_name="Вес (ID)"),
+                ),
+                (
+                    "weight_value",
+                    models.IntegerField(
+                        blank=True, null=True, verbose_name="Значение в граммах"
+                    ),
+                ),
+                (
+                    "weight_name",
+                    models.CharField(blank=True, max_length=50, verbose_name="Вес"),
+                ),
+                (
+                    "weight_name_ru",
+                    models.CharField(
+                        blank=True, max_length=50, null=True, verbose_name="Вес"
+                    ),
+                ),
+                (
+                    "weight_name_uk",
+                    models.CharField(
+                        blank=True, max_length=50, null=True, verbose_name="Вес"
+                    ),
+                ),
+                (
+                    "weight_name_en",
+                    models.CharField(
+                        blank=True, max_length=50, null=True, verbose_name="Вес"
+                    ),
+                ),
+                (
+                    "packaging_name",
+                    models.CharField(
+                        blank=True, max_length=255, verbose_name="Упаковка"
+                    ),
+                ),
+                (
+                    "packaging_name_ru",
+                    models.CharField(
+                        blank=True, max_length=255, null=True, verbose_name="Упаковка"
+                    ),
+                ),
+                (
+                    "packaging_name_uk",
+                    models.CharField(
+                        blank=True, max_length=255, null=True, verbose_name="Упаковка"
+                    ),
+                ),
+                (
+                    "packaging_name_en",
+                    models.CharField(
+                        blank=True, max_length=255, null=True, verbose_name="Упаковка"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Обновлено"),
+                ),
+            ],
+            options={
+                "verbose_name": "Карточка каталога",
+                "verbose_name_plural": "Карточки каталога",
+                "indexes": [
+                    models.Index(
+                        fields=["-created_at", "-product"],
+                        name="shop_listing_created_idx",
+                    ),
+                    models.Index(
+                        fields=["price", "product"], name="shop_listing_price_idx"
+                    ),
+                    models.Index(fields=["weight_id"], name="shop_listing_weight_idx"),
+                ],
+            },
+        ),
+    ]
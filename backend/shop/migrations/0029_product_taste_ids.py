@@ -0,0 +1,47 @@
+# Generated by Django 6.0.1 on 2026-10-18 02:04
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+def populate_taste_ids(apps, schema_editor):
+    """Copy the tastes relation into the new taste_ids array."""
+    Product = apps.get_model("shop", "Product")
+    through = Product.tastes.through
+    taste_ids = {}
+    for product_id, taste_id in through.objects.order_by("producttaste_id").values_list(
+        "product_id", "producttaste_id"
+    ):
+        taste_ids.setdefault(product_id, []).append(taste_id)
+    for product_id, ids in taste_ids.items():
+        Product.objects.filter(id=product_id).update(taste_ids=ids)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("shop", "0028_productlisting"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="taste_ids",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.IntegerField(), default=list, editable=False
+            ),
+        ),
+        migrations.RunPython(populate_taste_ids, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="product",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["taste_ids"], name="shop_product_taste_ids_gin"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="productlisting",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["taste_ids"], name="shop_listing_taste_ids_gin"
+            ),
+        ),
+    ]
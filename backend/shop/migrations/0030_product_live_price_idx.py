@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 02:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("shop", "0029_product_taste_ids"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["live", "price"], name="shop_product_live_price_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 6.0.1 on 2026-10-18 02:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("shop", "0030_product_live_price_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="cart",
+            index=models.Index(
+                condition=models.Q(("user__isnull", True)),
+                fields=["session_key"],
+                name="shop_cart_session_key_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="cartitem",
+            index=models.Index(
+                fields=["cart", "product"], name="shop_cartitem_cart_product_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                condition=models.Q(("live", True)),
+                fields=["-created_at", "-id"],
+                name="shop_product_live_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                condition=models.Q(("is_new", True), ("live", True)),
+                fields=["-created_at", "-id"],
+                name="shop_product_new_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                condition=models.Q(("live", True)),
+                fields=["weight_option", "-created_at"],
+                name="shop_product_live_weight_idx",
+            ),
+        ),
+        # The auto-created tastes through table cannot declare Meta indexes.
+        # This covers taste -> products lookups with an index-only scan.
+        migrations.RunSQL(
+            "CREATE INDEX shop_product_tastes_taste_idx "
+            "ON shop_product_tastes (producttaste_id, product_id);",
+            "DROP INDEX IF EXISTS shop_product_tastes_taste_idx;",
+        ),
+    ]
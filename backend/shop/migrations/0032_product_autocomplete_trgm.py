@@ -0,0 +1,55 @@
+# Generated by Django 6.0.1 on 2026-10-18 02:22
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("shop", "0031_catalog_and_cart_indexes"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="product",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("title_ru"),
+                    name="gin_trgm_ops",
+                ),
+                name="shop_product_title_ru_trgm",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("title_uk"),
+                    name="gin_trgm_ops",
+                ),
+                name="shop_product_title_uk_trgm",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("title_en"),
+                    name="gin_trgm_ops",
+                ),
+                name="shop_product_title_en_trgm",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("sku"), name="gin_trgm_ops"
+                ),
+                name="shop_product_sku_trgm",
+            ),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 6.0.1 on 2026-10-18 02:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("shop", "0033_product_search_vectors"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductRecommendation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.PositiveIntegerField(verbose_name="Заказов вместе")),
+                ("rank", models.PositiveSmallIntegerField(verbose_name="Позиция")),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="recommendations",
+                        to="shop.product",
+                        verbose_name="Товар",
+                    ),
+                ),
+                (
+                    "recommended",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="shop.product",
+                        verbose_name="Рекомендуемый товар",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Рекомендация товара",
+                "verbose_name_plural": "Рекомендации товаров",
+                "ordering": ["product", "rank"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("product", "rank"), name="shop_recommendation_rank_uniq"
+                    )
+                ],
+            },
+        ),
+    ]
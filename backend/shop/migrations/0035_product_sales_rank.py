@@ -0,0 +1,38 @@
+# Generated by Django 6.0.1 on 2026-10-18 02:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("shop", "0034_productrecommendation"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="sales_rank",
+            field=models.FloatField(
+                default=0, editable=False, verbose_name="Рейтинг продаж"
+            ),
+        ),
+        migrations.AddField(
+            model_name="productlisting",
+            name="sales_rank",
+            field=models.FloatField(default=0, verbose_name="Рейтинг продаж"),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                condition=models.Q(("live", True)),
+                fields=["-sales_rank", "-id"],
+                name="shop_product_live_popular_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="productlisting",
+            index=models.Index(
+                fields=["-sales_rank", "-product"], name="shop_listing_popular_idx"
+            ),
+        ),
+    ]
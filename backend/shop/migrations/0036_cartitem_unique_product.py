@@ -0,0 +1,42 @@
+# Generated by Django 6.0.1 on 2026-10-18 03:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("shop", "0035_product_sales_rank"),
+    ]
+
+    operations = [
+        # Merge duplicate lines into the oldest one before making them unique.
+        migrations.RunSQL(
+            """
+            UPDATE shop_cartitem AS keep
+            SET quantity = dup.total
+            FROM (
+                SELECT MIN(id) AS id, SUM(quantity) AS total
+                FROM shop_cartitem
+                GROUP BY cart_id, product_id
+                HAVING COUNT(*) > 1
+            ) AS dup
+            WHERE keep.id = dup.id;
+            DELETE FROM shop_cartitem AS extra
+            USING shop_cartitem AS keep
+            WHERE extra.cart_id = keep.cart_id
+              AND extra.product_id = keep.product_id
+              AND extra.id > keep.id;
+            """,
+            migrations.RunSQL.noop,
+        ),
+        migrations.RemoveIndex(
+            model_name="cartitem",
+            name="shop_cartitem_cart_product_idx",
+        ),
+        migrations.AddConstraint(
+            model_name="cartitem",
+            constraint=models.UniqueConstraint(
+                fields=("cart", "product"), name="shop_cartitem_cart_product_uniq"
+            ),
+        ),
+    ]
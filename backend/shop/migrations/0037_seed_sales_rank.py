@@ -0,0 +1,42 @@
+# Generated by Django 6.0.1 on 2026-10-18 04:12
+
+from django.db import migrations
+from django.utils import timezone
+
+# shop.popularity.SALES_RANK_DAILY_DECAY at the time of this migration.
+SALES_RANK_DAILY_DECAY = 0.5 ** (1 / 7)
+
+
+def seed_sales_rank(apps, schema_editor):
+    """Rank products by their past orders, decayed as if ranked every day."""
+    Product = apps.get_model("shop", "Product")
+    ProductListing = apps.get_model("shop", "ProductListing")
+    OrderItem = apps.get_model("shop", "OrderItem")
+
+    now = timezone.now()
+    ranks = {}
+    items = OrderItem.objects.filter(product__isnull=False).values_list(
+        "product_id", "quantity", "order__created_at"
+    )
+    for product_id, quantity, created_at in items.iterator():
+        days = (now - created_at).total_seconds() / 86400
+        ranks[product_id] = ranks.get(product_id, 0) + quantity * (
+            SALES_RANK_DAILY_DECAY ** max(days, 0)
+        )
+
+    for model in (Product, ProductListing):
+        model.objects.bulk_update(
+            [model(pk=pk, sales_rank=rank) for pk, rank in ranks.items()],
+            ["sales_rank"],
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("shop", "0036_cartitem_unique_product"),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_sales_rank, migrations.RunPython.noop),
+    ]
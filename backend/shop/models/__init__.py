@@ -10,7 +10,9 @@ from .ecommerce import (
     OrderSuccessPage,
     PaymentTransaction,
 )
+from .listing import ProductListing
 from .products import Product, ProductGalleryImage, ShopIndexPage
+from .recommendations import ProductRecommendation
 from .snippets import ProductPackaging, ProductTaste, ProductWeight
 
 __all__ = [
@@ -24,7 +26,9 @@ __all__ = [
     "PaymentTransaction",
     "Product",
     "ProductGalleryImage",
+    "ProductListing",
     "ProductPackaging",
+    "ProductRecommendation",
     "ProductTaste",
     "ProductWeight",
     "ShopIndexPage",
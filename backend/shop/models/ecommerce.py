@@ -2,18 +2,22 @@
 
 import logging
 import uuid
+from importlib import import_module
 
-from contacts.blocks import ContactImportBlock
 from django.conf import settings
 from django.contrib import messages
 from django.db import models, transaction
+from django.db.models import F, Sum
 from django.shortcuts import redirect, render
 from django.utils.translation import gettext_lazy as _
-from home.blocks import HeroBlock
 from wagtail.admin.panels import FieldPanel
 from wagtail.fields import StreamField
 from wagtail.models import Page
 
+from contacts.blocks import ContactImportBlock
+from home.blocks import HeroBlock
+from shop.popularity import record_sales
+
 from .products import Product
 
 # pylint: disable=no-member, too-few-public-methods, too-many-ancestors, cyclic-import, disable=duplicate-code
@@ -64,6 +68,14 @@ class Cart(models.Model):
 
         verbose_name = _("Корзина")
         verbose_name_plural = _("Корзины")
+        indexes = [
+            # Anonymous carts are looked up by session key.
+            models.Index(
+                fields=["session_key"],
+                name="shop_cart_session_key_idx",
+                condition=models.Q(user__isnull=True),
+            ),
+        ]
 
     def __str__(self):
         """Return string representation of the Cart."""
@@ -71,7 +83,8 @@ class Cart(models.Model):
 
     def get_total_price(self):
         """Calculate and return the total price of all items in the cart."""
-        return sum(item.get_cost() for item in self.items.all())
+        total = self.items.aggregate(total=Sum(F("quantity") * F("product__price")))
+        return total["total"] or 0
 
 
 class CartItem(models.Model):
@@ -90,6 +103,12 @@ class CartItem(models.Model):
 
         verbose_name = _("Элемент корзины")
         verbose_name_plural = _("Элементы корзины")
+        constraints = [
+            # One line per product; quantity changes are upserts against it.
+            models.UniqueConstraint(
+                fields=["cart", "product"], name="shop_cartitem_cart_product_uniq"
+            ),
+        ]
 
     def __str__(self):
         """Return string representation of the CartItem."""
@@ -252,8 +271,10 @@ class CartPage(Page):
 
     def get_context(self, request, *args, **kwargs):
         """Injects the current user's cart into the template context."""
+        # Resolve Cyclic Import: shop.carts imports the models of this module.
+        carts = import_module("shop.carts")
         context = super().get_context(request, *args, **kwargs)
-        context["cart"] = get_or_create_cart(request)
+        context["cart"] = carts.get_cart(request).get_summary()
         return context
 
 
@@ -269,45 +290,53 @@ class CheckoutPage(Page):
         """Process the checkout form submission.
 
         Uses transaction.atomic() to ensure the order, its items, and the cart
-        clearing happen as a single, indivisible database operation.
+        clearing happen as a single, indivisible database operation. A cart
+        kept outside the database is persisted within the same transaction.
         """
-        # pylint: disable=import-outside-toplevel
-        from shop.forms import CheckoutForm
+        # Resolve Cyclic Import: both modules import the models of this module.
+        carts = import_module("shop.carts")
+        forms = import_module("shop.forms")
 
-        cart = get_or_create_cart(request)
+        cart = carts.get_cart(request)
+        summary = cart.get_summary()
 
-        if not cart.items.exists():
+        if not summary.total_items:
             logger.warning("Attempted checkout with an empty cart.")
             messages.warning(request, _("Ваша корзина пуста."))
             return redirect(self.get_parent().url)
 
         if request.method == "POST":
-            form = CheckoutForm(request.POST)
+            form = forms.CheckoutForm(request.POST)
             if form.is_valid():
                 try:
                     with transaction.atomic():
+                        stored_cart = cart.persist()
+                        stored = carts.DatabaseCart(stored_cart).get_summary()
                         order = form.save(commit=False)
 
                         if request.user.is_authenticated:
                             order.user = request.user
 
-                        order.total_amount = cart.get_total_price()
-                        order.items_count = sum(
-                            item.quantity for item in cart.items.all()
-                        )
+                        order.total_amount = stored.total_price
+                        order.items_count = stored.total_items
                         order.order_number = f"ORD-{uuid.uuid4().hex[:6].upper()}"
                         order.save()
 
-                        for item in cart.items.all():
+                        sold = {}
+                        for line in stored.lines:
                             OrderItem.objects.create(
                                 order=order,
-                                product=item.product,
-                                product_name=item.product.title,
-                                price=item.product.price,
-                                quantity=item.quantity,
+                                product=line.product,
+                                product_name=line.product.title,
+                                price=line.product.price,
+                                quantity=line.quantity,
+                            )
+                            sold[line.product.id] = (
+                                sold.get(line.product.id, 0) + line.quantity
                             )
+                        record_sales(sold)
 
-                        cart.items.all().delete()
+                        stored_cart.items.all().delete()
 
                     logger.info(
                         "Order %s successfully created for user %s.",
@@ -353,11 +382,11 @@ class CheckoutPage(Page):
                     "company_name": getattr(request.user, "company_name", ""),
                     "okpo": getattr(request.user, "okpo", ""),
                 }
-            form = CheckoutForm(initial=initial_data)
+            form = forms.CheckoutForm(initial=initial_data)
 
         context = self.get_context(request, *args, **kwargs)
         context["form"] = form
-        context["cart"] = cart
+        context["cart"] = summary
         return render(request, self.template, context)
 
 
@@ -0,0 +1,127 @@
+"""shop/models/listing.py."""
+
+import logging
+
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+logger = logging.getLogger(__name__)
+
+# pylint: disable=too-few-public-methods
+
+
+class ProductListingQuerySet(models.QuerySet):
+    """Custom QuerySet for the denormalized catalog read model."""
+
+    def filter_catalog(  # pylint: disable=too-many-arguments
+        self,
+        taste_ids=(),
+        weight_ids=(),
+        *,
+        new_only=False,
+        min_price=None,
+        max_price=None,
+    ):
+        """Apply the catalog sidebar filters without joining other tables."""
+        queryset = self
+        if taste_ids:
+            queryset = queryset.filter(taste_ids__overlap=list(taste_ids))
+        if weight_ids:
+            queryset = queryset.filter(weight_id__in=weight_ids)
+        if new_only:
+            queryset = queryset.filter(is_new=True)
+        if min_price is not None:
+            queryset = queryset.filter(price__gte=min_price)
+        if max_price is not None:
+            queryset = queryset.filter(price__lte=max_price)
+        return queryset
+
+
+class ProductListing(models.Model):
+    """Denormalized read model holding everything a catalog card renders.
+
+    One row exists per live Product. Translatable values are stored per
+    locale through django-modeltranslation, and gallery renditions are stored
+    as ready-to-use URLs, so a listing page is served by a single indexed
+    query on this table. Rows are rebuilt by ``shop.listing`` from signals.
+    """
+
+    product = models.OneToOneField(
+        "shop.Product",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="listing",
+        verbose_name=_("Товар"),
+    )
+    title = models.CharField(_("Название товара"), max_length=255)
+    slug = models.CharField(_("URL (slug)"), max_length=255)
+    sku = models.CharField(_("Артикул"), max_length=50, blank=True)
+    price = models.DecimalField(_("Цена"), max_digits=10, decimal_places=0)
+    old_price = models.DecimalField(
+        _("Старая цена"), max_digits=10, decimal_places=0, null=True, blank=True
+    )
+    is_new = models.BooleanField(_("Новинка"), default=False)
+    is_sale = models.BooleanField(_("Акция"), default=False)
+    created_at = models.DateTimeField(_("Создан"))
+
+    images = models.JSONField(_("Изображения"), default=list, blank=True)
+    taste_ids = ArrayField(models.IntegerField(), default=list, blank=True)
+    taste_names = models.TextField(_("Вкусы"), blank=True)
+    weight_id = models.IntegerField(_("Вес (ID)"), null=True, blank=True)
+    weight_value = models.IntegerField(_("Значение в граммах"), null=True, blank=True)
+    weight_name = models.CharField(_("Вес"), max_length=50, blank=True)
+    packaging_name = models.CharField(_("Упаковка"), max_length=255, blank=True)
+    sales_rank = models.FloatField(_("Рейтинг продаж"), default=0)
+
+    updated_at = models.DateTimeField(_("Обновлено"), auto_now=True)
+
+    objects = ProductListingQuerySet.as_manager()
+
+    class Meta:
+        """Meta options for the ProductListing model."""
+
+        verbose_name = _("Карточка каталога")
+        verbose_name_plural = _("Карточки каталога")
+        indexes = [
+            models.Index(
+                fields=["-created_at", "-product"], name="shop_listing_created_idx"
+            ),
+            models.Index(fields=["price", "product"], name="shop_listing_price_idx"),
+            models.Index(
+                fields=["-sales_rank", "-product"], name="shop_listing_popular_idx"
+            ),
+            models.Index(fields=["weight_id"], name="shop_listing_weight_idx"),
+            GinIndex(fields=["taste_ids"], name="shop_listing_taste_ids_gin"),
+        ]
+
+    def __str__(self):
+        """Return the string representation of the listing (its title)."""
+        return str(self.title)
+
+    @property
+    def id(self):
+        """Return the id of the listed product, as catalog cards expect."""
+        return self.product_id
+
+    @property
+    def weight_option_id(self):
+        """Return the weight id under the name Product uses."""
+        return self.weight_id
+
+    def get_card_images(self):
+        """Return the stored listing renditions (url, width, height, alt)."""
+        return self.images
+
+    def get_tastes_display(self):
+        """Return the comma-separated taste names for the active language."""
+        return self.taste_names
+
+    def get_weight_name(self):
+        """Return the weight label for the active language."""
+        return self.weight_name
+
+    def get_packaging_name(self):
+        """Return the packaging label for the active language."""
+        return self.packaging_name
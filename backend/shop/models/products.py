@@ -1,27 +1,168 @@
 """shop/models/products.py."""
 
 import logging
-
-from contacts.blocks import ContactImportBlock
-from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
-from django.db import models
-from django.shortcuts import get_object_or_404, render
+from http import HTTPStatus
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    SearchVectorField,
+    TrigramWordSimilarity,
+)
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, models
+from django.db.models import Case, F, Prefetch, Q, Value, When
+from django.db.models.functions import Greatest, Upper
+from django.http import Http404, HttpResponse
+from django.middleware.csrf import get_token
+from django.shortcuts import redirect
 from django.template.response import TemplateResponse
+from django.utils import translation
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
 from django.utils.translation import gettext_lazy as _
-from home.blocks import EcoBannerBlock, HeroBlock
 from modelcluster.fields import ParentalKey
 from modelcluster.models import ClusterableModel
+from modeltranslation.utils import build_localized_fieldname, get_language
 from wagtail.admin.panels import FieldPanel, InlinePanel
 from wagtail.contrib.routable_page.models import RoutablePageMixin, route
 from wagtail.fields import StreamField
+from wagtail.images import get_image_model
 from wagtail.models import Locale, Orderable, Page
 
+from contacts.blocks import ContactImportBlock
+from core.pagination import LazyCountPaginator
+from home.blocks import EcoBannerBlock, HeroBlock
 from shop.blocks import ProductTabsBlock
-
-from .snippets import ProductPackaging, ProductTaste, ProductWeight
+from shop.cache import (
+    CATALOG_CACHE_TIMEOUT,
+    CSRF_TOKEN_PLACEHOLDER,
+    catalog_cache_key,
+    catalog_page_cache_key,
+    get_cached_catalog_page,
+    get_cached_product_detail,
+    get_catalog_version,
+    make_etag,
+    product_detail_cache_key,
+    product_page_cache_key,
+    set_cached_catalog_page,
+)
+from shop.facets import get_catalog_facets, get_price_histogram
+from shop.pagination import InvalidCursorError, KeysetPaginator
+from shop.warmup import record_catalog_hit
+
+from .listing import ProductListing
+from .snippets import ProductPackaging, ProductTaste
 
 logger = logging.getLogger(__name__)
 
+LISTING_RENDITION = "fill-400x400"
+DETAIL_RENDITION = "max-1000x1000"
+DETAIL_RENDITIONS = ("original", DETAIL_RENDITION)
+
+# Every catalog ordering ends with the primary key so keyset cursors are
+# unambiguous. "pk" keeps them valid for both Product and ProductListing.
+CATALOG_ORDERINGS = {
+    "default": ("-created_at", "-pk"),
+    "new": ("-created_at", "-pk"),
+    "price_asc": ("price", "pk"),
+    "price_desc": ("-price", "-pk"),
+    "popular": ("-sales_rank", "-pk"),
+}
+
+# Listing query parameters that take a single value.
+LISTING_VALUE_PARAMS = ("price_min", "price_max", "sort", "page", "cursor")
+
+# Rebuilds ``taste_ids`` for a set of products from the tastes relation;
+# products without tastes get an empty array.
+SYNC_TASTE_IDS_SQL = """
+    UPDATE {product} AS product
+    SET taste_ids = tastes.ids
+    FROM (
+        SELECT product.id, COALESCE(
+            array_agg(through.producttaste_id ORDER BY through.producttaste_id)
+                FILTER (WHERE through.producttaste_id IS NOT NULL),
+            '{{}}'
+        ) AS ids
+        FROM {product} AS product
+        LEFT JOIN {through} AS through ON through.product_id = product.id
+        WHERE product.id IN ({products})
+        GROUP BY product.id
+    ) AS tastes
+    WHERE product.id = tastes.id
+"""
+
+# Fields matched by the typeahead; each has an UPPER() trigram index.
+AUTOCOMPLETE_FIELDS = ("title_ru", "title_uk", "title_en", "sku")
+
+# Text search configuration per language. PostgreSQL ships no Ukrainian
+# stemmer, so Ukrainian is only normalized to lower case.
+SEARCH_CONFIGS = {"ru": "russian", "uk": "simple", "en": "english"}
+
+
+def search_vector_field(language):
+    """Return a stored generated tsvector over a language's title and composition."""
+    config = SEARCH_CONFIGS[language]
+    return models.GeneratedField(
+        expression=(
+            SearchVector(f"title_{language}", weight="A", config=config)
+            + SearchVector("sku", weight="A", config="simple")
+            + SearchVector(f"composition_{language}", weight="B", config=config)
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+
+def parse_id_list(values):
+    """Return the sorted, unique integer ids from repeated query parameters.
+
+    Values may also be comma-separated; anything that is not an id is ignored.
+    """
+    ids = set()
+    for value in values:
+        ids.update(int(part) for part in value.split(",") if part.strip().isdigit())
+    return sorted(ids)
+
+
+def cached_page_response(request, content):
+    """Return a cached page, filling in the requesting visitor's CSRF token."""
+    return HttpResponse(
+        content.replace(CSRF_TOKEN_PLACEHOLDER.encode(), get_token(request).encode())
+    )
+
+
+def store_page_response(request, response, key, version):
+    """Render a response into the page cache, then fill in the CSRF token.
+
+    The response is rendered with a placeholder instead of the visitor's CSRF
+    token, so the cached content can be shared by all anonymous visitors.
+    """
+    response.context_data["csrf_token"] = CSRF_TOKEN_PLACEHOLDER
+    response.render()
+    if response.status_code == HTTPStatus.OK:
+        set_cached_catalog_page(key, version, response.content)
+    response.content = response.content.replace(
+        CSRF_TOKEN_PLACEHOLDER.encode(), get_token(request).encode()
+    )
+    return response
+
+
+def parse_price(value):
+    """Return a whole-number price from a query parameter, or None."""
+    value = (value or "").strip()
+    return int(value) if value.isdigit() else None
+
 
 class ProductPage(Page):  # pylint: disable=too-many-ancestors
     """A global Wagtail Page template for individual product detail views.
@@ -59,6 +200,30 @@ class ProductPage(Page):  # pylint: disable=too-many-ancestors
     parent_page_types = ["shop.ShopIndexPage"]
     subpage_types = []
 
+    @classmethod
+    def get_cached_template(cls):
+        """Return the ProductPage of the active locale and its rendered blocks.
+
+        Returns a dict with the ``page`` (falling back to any ProductPage) and
+        the pre-rendered ``body`` and ``footer`` HTML. It is cached per locale
+        until a page is published or the site settings change, since the
+        blocks only depend on those.
+        """
+        key = product_page_cache_key()
+        template = cache.get(key)
+        if template is None:
+            page = (
+                cls.objects.filter(locale=Locale.get_active()).first()
+                or cls.objects.first()
+            )
+            template = {
+                "page": page,
+                "body": page.body.render_as_block() if page else "",
+                "footer": page.footer_blocks.render_as_block() if page else "",
+            }
+            cache.set(key, template, CATALOG_CACHE_TIMEOUT)
+        return template
+
 
 class ProductGalleryImage(Orderable):  # pylint: disable=too-few-public-methods
     """Represents an orderable image within a product's gallery."""
@@ -84,6 +249,157 @@ class ProductGalleryImage(Orderable):  # pylint: disable=too-few-public-methods
         verbose_name_plural = _("Изображения галереи")
 
 
+class ProductQuerySet(models.QuerySet):
+    """Custom QuerySet for Product with catalog-specific loading helpers."""
+
+    def for_listing(self):
+        """Load everything a catalog card renders in a fixed number of queries.
+
+        Gallery images, their images and the listing renditions are prefetched
+        so the product grid costs the same number of queries for any page size.
+        """
+        return self.with_related(LISTING_RENDITION)
+
+    def for_detail(self):
+        """Load everything the product detail page renders in a fixed number of queries.
+
+        Same as ``for_listing``, with the renditions of the detail gallery.
+        """
+        return self.with_related(*DETAIL_RENDITIONS)
+
+    def with_related(self, *renditions):
+        """Select and prefetch the related objects and the given image renditions."""
+        images = get_image_model().objects.prefetch_renditions(*renditions)
+        gallery = ProductGalleryImage.objects.order_by("sort_order").prefetch_related(
+            Prefetch("image", queryset=images)
+        )
+        return self.select_related("weight_option", "packaging").prefetch_related(
+            Prefetch("gallery_images", queryset=gallery),
+            "tastes",
+        )
+
+    def sync_taste_ids(self):
+        """Refresh the denormalized ``taste_ids`` array from the tastes relation.
+
+        All products of the queryset are updated by a single statement; an
+        empty queryset issues none.
+        """
+        try:
+            products_sql, params = self.order_by().values("id").query.sql_with_params()
+        except EmptyResultSet:
+            return
+        connection = connections[self.db]
+        quote_name = connection.ops.quote_name
+        through = self.model.tastes.through
+        sql = SYNC_TASTE_IDS_SQL.format(
+            product=quote_name(self.model._meta.db_table),  # noqa: SLF001
+            through=quote_name(through._meta.db_table),  # noqa: SLF001
+            products=products_sql,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+    def filter_catalog(  # pylint: disable=too-many-arguments
+        self,
+        taste_ids=(),
+        weight_ids=(),
+        *,
+        new_only=False,
+        min_price=None,
+        max_price=None,
+    ):
+        """Apply the catalog sidebar filters.
+
+        Several tastes or weights match any of them. Tastes are matched on the
+        denormalized ``taste_ids`` array, so no join and no DISTINCT is needed.
+        The price range is served by the ``(live, price)`` index.
+        """
+        queryset = self
+        if taste_ids:
+            queryset = queryset.filter(taste_ids__overlap=list(taste_ids))
+        if weight_ids:
+            queryset = queryset.filter(weight_option_id__in=weight_ids)
+        if new_only:
+            queryset = queryset.filter(is_new=True)
+        if min_price is not None:
+            queryset = queryset.filter(price__gte=min_price)
+        if max_price is not None:
+            queryset = queryset.filter(price__lte=max_price)
+        return queryset
+
+    def search(self, query, language=None):
+        """Return the products matching a full-text query, best matches first.
+
+        The query is parsed with ``websearch_to_tsquery`` (quotes, ``or`` and
+        ``-`` work as on search engines) and matched against the stored
+        tsvector of the active language, which has a GIN index.
+        """
+        language = language or translation.get_language()
+        if language not in SEARCH_CONFIGS:
+            language = settings.MODELTRANSLATION_DEFAULT_LANGUAGE
+        vector = F(f"search_vector_{language}")
+        search_query = SearchQuery(
+            query, config=SEARCH_CONFIGS[language], search_type="websearch"
+        )
+        return (
+            self.filter(**{f"search_vector_{language}": search_query})
+            .annotate(rank=SearchRank(vector, search_query))
+            .order_by("-rank", "-created_at", "-pk")
+        )
+
+    def get_by_slug(self, slug):
+        """Return the product whose slug in any language is ``slug``.
+
+        Every ``slug_<lang>`` column has a unique index, so this is a single
+        indexed query. A match in the active language wins over a match in
+        another one. Raises ``DoesNotExist`` when nothing matches.
+        """
+        active_field = build_localized_fieldname("slug", get_language())
+        matches = Q()
+        for lang_code, _name in settings.LANGUAGES:
+            matches |= Q(**{build_localized_fieldname("slug", lang_code): slug})
+        product = (
+            self.filter(matches)
+            .order_by(Case(When(**{active_field: slug}, then=Value(0)), default=1))
+            .first()
+        )
+        if product is None:
+            raise self.model.DoesNotExist
+        return product
+
+    def autocomplete(self, term):
+        """Match a typeahead term against the titles in every language and SKU.
+
+        A product matches when a field contains the term or is similar to it
+        word-wise (``<%``), so typos still find it. Both operators run on
+        ``UPPER(field)``, which is what the trigram GIN indexes cover. The term
+        is upper-cased by the database too, so both sides follow its collation.
+        Results are ranked by the best word similarity, prefixes first.
+        """
+        term = Upper(Value(term))
+        aliases = {f"{field}_upper": Upper(field) for field in AUTOCOMPLETE_FIELDS}
+        matches = Q()
+        for alias in aliases:
+            matches |= Q(**{f"{alias}__contains": term})
+            matches |= Q(**{f"{alias}__trigram_word_similar": term})
+        is_prefix = Q()
+        for alias in aliases:
+            is_prefix |= Q(**{f"{alias}__startswith": term})
+        return (
+            self.alias(**aliases)
+            .filter(matches)
+            .annotate(
+                is_prefix=models.ExpressionWrapper(
+                    is_prefix, output_field=models.BooleanField()
+                ),
+                rank=Greatest(
+                    *(TrigramWordSimilarity(term, F(alias)) for alias in aliases)
+                ),
+            )
+            .order_by("-is_prefix", "-rank", "title", "pk")
+        )
+
+
 class Product(ClusterableModel):  # pylint: disable=too-few-public-methods
     """Represents a specific product entity in the e-commerce database.
 
@@ -124,6 +440,8 @@ class Product(ClusterableModel):  # pylint: disable=too-few-public-methods
     )
 
     tastes = models.ManyToManyField(ProductTaste, blank=True, verbose_name=_("Вкусы"))
+    # Denormalized copy of the tastes ids, kept in sync by shop.signals.
+    taste_ids = ArrayField(models.IntegerField(), default=list, editable=False)
     packaging = models.ForeignKey(
         ProductPackaging,
         null=True,
@@ -136,6 +454,14 @@ class Product(ClusterableModel):  # pylint: disable=too-few-public-methods
     is_sale = models.BooleanField(_("Акция"), default=False)
     live = models.BooleanField(_("Опубликовано"), default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Units sold, decayed daily; maintained by shop.popularity.
+    sales_rank = models.FloatField(_("Рейтинг продаж"), default=0, editable=False)
+
+    search_vector_ru = search_vector_field("ru")
+    search_vector_uk = search_vector_field("uk")
+    search_vector_en = search_vector_field("en")
+
+    objects = ProductQuerySet.as_manager()
 
     class Meta:  # pylint: disable=too-few-public-methods
         """Meta options for the Product model."""
@@ -143,6 +469,47 @@ class Product(ClusterableModel):  # pylint: disable=too-few-public-methods
         verbose_name = _("Товар")
         verbose_name_plural = _("Товары")
         ordering = ["-created_at"]
+        indexes = [
+            GinIndex(fields=["taste_ids"], name="shop_product_taste_ids_gin"),
+            *(
+                GinIndex(
+                    fields=[f"search_vector_{language}"],
+                    name=f"shop_product_search_{language}_gin",
+                )
+                for language in SEARCH_CONFIGS
+            ),
+            # Trigram indexes for the typeahead, see ProductQuerySet.autocomplete.
+            *(
+                GinIndex(
+                    OpClass(Upper(field), name="gin_trgm_ops"),
+                    name=f"shop_product_{field}_trgm",
+                )
+                for field in AUTOCOMPLETE_FIELDS
+            ),
+            models.Index(fields=["live", "price"], name="shop_product_live_price_idx"),
+            # Partial indexes for the default/"new" orderings and the weight
+            # filter; hidden products never reach the catalog.
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="shop_product_live_created_idx",
+                condition=Q(live=True),
+            ),
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="shop_product_new_created_idx",
+                condition=Q(live=True, is_new=True),
+            ),
+            models.Index(
+                fields=["-sales_rank", "-id"],
+                name="shop_product_live_popular_idx",
+                condition=Q(live=True),
+            ),
+            models.Index(
+                fields=["weight_option", "-created_at"],
+                name="shop_product_live_weight_idx",
+                condition=Q(live=True),
+            ),
+        ]
 
     panels = [
         FieldPanel("title"),
@@ -168,18 +535,55 @@ class Product(ClusterableModel):  # pylint: disable=too-few-public-methods
         return str(self.title)
 
     def get_gallery_images(self):
-        """Retrieve all gallery images associated with this product."""
+        """Retrieve all gallery images associated with this product.
+
+        Returns the prefetched list when the product was loaded via
+        ``Product.objects.for_listing()``.
+        """
         # pylint: disable=no-member
         return self.gallery_images.all()
 
+    def get_card_images(self):
+        """Return the listing renditions of the gallery images for a catalog card."""
+        return [
+            gallery_image.image.get_rendition(LISTING_RENDITION)
+            for gallery_image in self.get_gallery_images()
+        ]
+
+    def get_tastes_display(self):
+        """Return the comma-separated taste names for the active language."""
+        # pylint: disable=no-member
+        return ", ".join(str(taste.name) for taste in self.tastes.all())
+
+    def get_first_taste(self):
+        """Return the taste with the lowest id, reading the prefetched tastes."""
+        # pylint: disable=no-member
+        return min(self.tastes.all(), key=lambda taste: taste.pk, default=None)
+
+    def get_weight_name(self):
+        """Return the weight label for the active language."""
+        return str(self.weight_option.name) if self.weight_option else ""
+
+    def get_packaging_name(self):
+        """Return the packaging label for the active language."""
+        return str(self.packaging.name) if self.packaging else ""
+
+    def get_slug(self, language=None):
+        """Return the canonical slug for a language (the active one by default).
+
+        Falls back like the ``slug`` field itself when the language has no
+        translated slug, so it matches the URLs that resolve to this product.
+        """
+        with translation.override(language or get_language()):
+            return self.slug
+
     def get_main_image(self):
         """Retrieve the first image from the product's gallery.
 
         This serves as the main display image.
         """
-        # pylint: disable=no-member
-        first = self.gallery_images.first()
-        return first.image if first else None
+        images = self.get_gallery_images()
+        return images[0].image if images else None
 
 
 class ShopIndexPage(RoutablePageMixin, Page):  # pylint: disable=too-many-ancestors
@@ -234,49 +638,84 @@ class ShopIndexPage(RoutablePageMixin, Page):  # pylint: disable=too-many-ancest
     def get_context(self, request, *args, **kwargs):
         """Build the context for the template.
 
-        Applies filters (taste, weight), sorting, and pagination
-        to the product list.
+        Applies filters (taste, weight, price range), sorting, and pagination
+        to the product list. Requests without a ``page`` parameter, including
+        the HTMX "Show more" requests, use keyset pagination driven by an
+        opaque ``cursor`` and never count the full result set. Facet counts
+        and the price histogram are skipped for "Show more" requests.
         """
         context = super().get_context(request, *args, **kwargs)
-        # pylint: disable=no-member
-        products = Product.objects.filter(live=True)
-
-        taste_id = request.GET.get("taste")
-        if taste_id:
-            products = products.filter(tastes__id=taste_id)
-            context["current_taste"] = int(taste_id)
 
-        weight_id = request.GET.get("weight")
-        if weight_id:
-            products = products.filter(weight_option__id=weight_id)
-            context["current_weight"] = int(weight_id)
+        current_tastes = parse_id_list(request.GET.getlist("taste"))
+        current_weights = parse_id_list(request.GET.getlist("weight"))
+        current_price_min = parse_price(request.GET.get("price_min"))
+        current_price_max = parse_price(request.GET.get("price_max"))
+        context["current_tastes"] = current_tastes
+        context["current_weights"] = current_weights
+        context["current_price_min"] = current_price_min
+        context["current_price_max"] = current_price_max
 
         sort_val = request.GET.get("sort")
-        if sort_val == "price_asc":
-            products = products.order_by("price")
-            context["current_sort"] = "price_asc"
-        elif sort_val == "price_desc":
-            products = products.order_by("-price")
-            context["current_sort"] = "price_desc"
-        elif sort_val == "new":
-            products = products.filter(is_new=True).order_by("-created_at")
-            context["current_sort"] = "new"
+        current_sort = sort_val if sort_val in CATALOG_ORDERINGS else "default"
+        ordering = CATALOG_ORDERINGS[current_sort]
+        context["current_sort"] = current_sort
+
+        filter_params = {"taste": current_tastes, "weight": current_weights}
+        if current_price_min is not None:
+            filter_params["price_min"] = current_price_min
+        if current_price_max is not None:
+            filter_params["price_max"] = current_price_max
+        if current_sort != "default":
+            filter_params["sort"] = current_sort
+        filter_query = urlencode(filter_params, doseq=True)
+        context["filter_query"] = filter_query
+
+        catalog_filters = {
+            "new_only": current_sort == "new",
+            "min_price": current_price_min,
+            "max_price": current_price_max,
+        }
+
+        if settings.SHOP_CATALOG_READ_MODEL:
+            products = ProductListing.objects.all()
         else:
-            products = products.order_by("-created_at")
-            context["current_sort"] = "default"
+            # pylint: disable=no-member
+            products = Product.objects.filter(live=True).for_listing()
+        products = products.filter_catalog(
+            current_tastes, current_weights, **catalog_filters
+        )
 
-        paginator = Paginator(products, self.products_per_page)
         page = request.GET.get("page")
-        try:
-            products_page = paginator.page(page)
-        except PageNotAnInteger:
-            products_page = paginator.page(1)
-        except EmptyPage:
-            products_page = paginator.page(paginator.num_pages)
+        if page is None:
+            paginator = KeysetPaginator(products, self.products_per_page, ordering)
+            products_page = paginator.page(request.GET.get("cursor"))
+        else:
+            paginator = LazyCountPaginator(
+                products.order_by(*ordering),
+                self.products_per_page,
+                count_cache_key=catalog_cache_key(
+                    "count", settings.SHOP_CATALOG_READ_MODEL, filter_query
+                ),
+                count_cache_timeout=CATALOG_CACHE_TIMEOUT,
+            )
+            products_page = paginator.get_page(page)
 
         context["products"] = products_page
-        context["tastes"] = ProductTaste.objects.all()
-        context["weights"] = ProductWeight.objects.all()
+
+        # "Show more" fragments only append cards. Other HTMX requests come
+        # from a filter change and swap the sidebar in out of band.
+        is_htmx = request.headers.get("HX-Request") == "true"
+        is_next_page = "cursor" in request.GET or page is not None
+        if not (is_htmx and is_next_page):
+            facets = get_catalog_facets(
+                current_tastes, current_weights, **catalog_filters
+            )
+            context["tastes"] = facets["tastes"]
+            context["weights"] = facets["weights"]
+            context["price_histogram"] = get_price_histogram(
+                current_tastes, current_weights, new_only=current_sort == "new"
+            )
+            context["facets_oob"] = is_htmx
         logger.debug(
             "ShopIndexPage context built. Products count: %d, Sort: %s",
             len(products_page),
@@ -284,42 +723,248 @@ class ShopIndexPage(RoutablePageMixin, Page):  # pylint: disable=too-many-ancest
         )
         return context
 
-    def serve(self, request, *args, **kwargs):
+    def get_listing_key_parts(self, request):
+        """Return the normalized filter state a listing response depends on.
+
+        Values are parsed the way ``get_context`` parses them, so requests
+        that render the same listing share their key parts.
+        """
+        price_min = parse_price(request.GET.get("price_min"))
+        price_max = parse_price(request.GET.get("price_max"))
+        sort = request.GET.get("sort")
+        return (
+            self.pk,
+            ",".join(map(str, parse_id_list(request.GET.getlist("taste")))),
+            ",".join(map(str, parse_id_list(request.GET.getlist("weight")))),
+            "" if price_min is None else price_min,
+            "" if price_max is None else price_max,
+            sort if sort in CATALOG_ORDERINGS else "default",
+            request.GET.get("page", ""),
+            request.GET.get("cursor", "").rstrip("="),
+            "htmx" if request.headers.get("HX-Request") == "true" else "full",
+        )
+
+    @staticmethod
+    def has_valid_listing_params(request):
+        """Return True if every listing parameter of a request parses cleanly.
+
+        ``get_context`` ignores malformed values or falls back to a default
+        for them, and those requests are kept out of the page cache, so a
+        crafted query string cannot add entries for content already cached.
+        """
+        params = request.GET
+        if any(len(params.getlist(name)) > 1 for name in LISTING_VALUE_PARAMS):
+            return False
+        values = [
+            part.strip()
+            for name in ("taste", "weight")
+            for value in params.getlist(name)
+            for part in value.split(",")
+        ]
+        values += [
+            params.get("price_min", "").strip(),
+            params.get("price_max", "").strip(),
+        ]
+        if not all(value.isdigit() for value in values if value):
+            return False
+        if params.get("sort", "default") not in CATALOG_ORDERINGS:
+            return False
+        page = params.get("page")
+        if page is not None and not (page.isdigit() and int(page) > 0):
+            return False
+        cursor = params.get("cursor")
+        if cursor:
+            model = ProductListing if settings.SHOP_CATALOG_READ_MODEL else Product
+            ordering = CATALOG_ORDERINGS[params.get("sort", "default")]
+            try:
+                KeysetPaginator(model.objects.none(), 1, ordering).decode_cursor(cursor)
+            except InvalidCursorError:
+                return False
+        return True
+
+    def get_page_cache_key(self, request, view=None):
+        """Return the response cache key for a request, or None if uncacheable.
+
+        Besides the checks of ``can_cache_response``, only the catalog listing
+        itself is cached here, and only for well-formed parameters.
+        """
+        if (view is not None and view != self.index_route) or not (
+            self.can_cache_response(request) and self.has_valid_listing_params(request)
+        ):
+            return None
+        return catalog_page_cache_key(*self.get_listing_key_parts(request))
+
+    @staticmethod
+    def can_cache_response(request):
+        """Return True if the response to a request may go to the page cache.
+
+        Only anonymous GET requests are cached, and only while no flash
+        messages are waiting to be displayed.
+        """
+        return (
+            settings.SHOP_CATALOG_PAGE_CACHE
+            and request.method == "GET"
+            and not request.user.is_authenticated
+            and not len(messages.get_messages(request))
+        )
+
+    def get_fragment_etag(self, request):
+        """Return the ETag of the HTMX product list fragment.
+
+        Besides the catalog version and the filter state, the fragment embeds
+        a CSRF token, so the visitor and their CSRF cookie are part of the tag.
+        """
+        return make_etag(
+            "product-list",
+            get_catalog_version(),
+            translation.get_language(),
+            request.user.pk or "",
+            request.COOKIES.get(settings.CSRF_COOKIE_NAME, ""),
+            *self.get_listing_key_parts(request),
+        )
+
+    def serve(self, request, view=None, args=None, kwargs=None):
         """Handle the incoming request.
 
-        Supports HTMX for partial DOM updates of the product list.
+        Supports HTMX for partial DOM updates of the product list. Repeated
+        fragment requests are answered with 304 Not Modified before anything
+        is rendered. Anonymous listing responses are cached per catalog
+        version; the CSRF token is rendered as a placeholder and filled in for
+        each visitor.
         """
+        is_listing = view is None or view == self.index_route
+        is_htmx = request.headers.get("HX-Request") == "true"
+
+        etag = None
+        if is_listing and is_htmx and request.method in {"GET", "HEAD"}:
+            etag = self.get_fragment_etag(request)
+            response = get_conditional_response(request, etag=etag)
+            if response is not None:
+                response.headers["ETag"] = etag
+                return response
+
+        response = self.serve_listing(request, view, args, kwargs)
+
+        if is_listing:
+            patch_vary_headers(response, ["HX-Request"])
+        if etag and response.status_code == HTTPStatus.OK:
+            response.headers["ETag"] = etag
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def serve_listing(self, request, view=None, args=None, kwargs=None):
+        """Render the requested route, going through the page cache if allowed."""
+        cache_key = self.get_page_cache_key(request, view)
+        if (
+            cache_key
+            and settings.SHOP_CATALOG_WARMUP
+            and not request.headers.get("X-Cache-Warmup")
+        ):
+            record_catalog_hit(request)
+        if cache_key:
+            content, version = get_cached_catalog_page(cache_key)
+            if content is not None:
+                logger.debug("Serving ShopIndexPage from cache: %s", cache_key)
+                return cached_page_response(request, content)
+
         if request.headers.get("HX-Request") == "true":
             logger.info("Handling HTMX request for ShopIndexPage.")
-            context = self.get_context(request, *args, **kwargs)
-            return TemplateResponse(request, self.ajax_template, context)
-        return super().serve(request, *args, **kwargs)
+            context = self.get_context(request, *(args or []), **(kwargs or {}))
+            response = TemplateResponse(request, self.ajax_template, context)
+        else:
+            response = super().serve(request, view, args, kwargs)
+
+        if (
+            cache_key
+            and isinstance(response, TemplateResponse)
+            and self.serves_requested_page(request, response)
+        ):
+            return store_page_response(request, response, cache_key, version)
+        return response
+
+    @staticmethod
+    def serves_requested_page(request, response):
+        """Return False if an out-of-range page number fell back to another page."""
+        page = request.GET.get("page")
+        if page is None:
+            return True
+        products = (response.context_data or {}).get("products")
+        return getattr(products, "number", None) == int(page)
+
+    def resolve_product_slug(self, slug):
+        """Return ``(product_id, canonical_slug)`` for a slug in any language.
+
+        The result is cached per locale and catalog version, so a repeat
+        visit resolves the slug without touching the database. Raises Http404
+        when no live product has the slug.
+        """
+        key = catalog_cache_key("product-slug", slug)
+        resolved = cache.get(key)
+        if resolved is None:
+            try:
+                product = Product.objects.filter(live=True).get_by_slug(slug)  # pylint: disable=no-member
+            except Product.DoesNotExist as exc:
+                raise Http404 from exc
+            resolved = (product.pk, product.get_slug())
+            cache.set(key, resolved, CATALOG_CACHE_TIMEOUT)
+        return resolved
 
     @route(r"^([^/]+)/$")
     def product_detail(self, request, slug):
         """Handle product detail URLs based on the product slug.
 
-        Resolves the specific Product instance from the database and binds it
-        to the global ProductPage template to render the product detail view.
+        Resolves the specific Product instance from a slug in any language and
+        binds it to the global ProductPage template to render the product
+        detail view. A slug that is not the product's slug for the active
+        language is redirected to the canonical URL. Anonymous responses are
+        cached per product and locale until the product, a product shown on
+        its page or the ProductPage changes; the cart badge is loaded by HTMX
+        and the CSRF token is filled in per request.
         """
         logger.debug("Attempting to serve product detail for slug: %s", slug)
 
-        # pylint: disable=no-member
-        product = get_object_or_404(Product, slug=slug, live=True)
-
-        current_locale = Locale.get_active()
-        product_page_template = ProductPage.objects.filter(
-            locale=current_locale
-        ).first()
-
-        if not product_page_template:
-            product_page_template = ProductPage.objects.first()
+        product_id, canonical_slug = self.resolve_product_slug(slug)
+        if slug != canonical_slug:
+            # The resolution may be cached; never redirect to a hidden product.
+            if not Product.objects.filter(pk=product_id, live=True).exists():  # pylint: disable=no-member
+                raise Http404
+            url = f"{self.get_url(request)}{canonical_slug}/"
+            if request.META.get("QUERY_STRING"):
+                url = f"{url}?{request.META['QUERY_STRING']}"
+            return redirect(url, permanent=True)
+
+        cache_key = None
+        if self.can_cache_response(request):
+            cache_key = product_detail_cache_key(product_id)
+            content, version = get_cached_product_detail(cache_key, product_id)
+            if content is not None:
+                logger.debug("Serving product detail from cache: %s", cache_key)
+                return cached_page_response(request, content)
 
-        return render(
+        try:
+            product = Product.objects.for_detail().get(pk=product_id, live=True)  # pylint: disable=no-member
+        except Product.DoesNotExist as exc:
+            raise Http404 from exc
+        product_page_template = ProductPage.get_cached_template()
+
+        recommendations = [
+            recommendation.recommended
+            for recommendation in product.recommendations.filter(
+                recommended__live=True
+            ).select_related("recommended")
+        ]
+
+        response = TemplateResponse(
             request,
             "shop/product_page.html",
             {
-                "page": product_page_template,
+                "page": product_page_template["page"],
+                "product_page_body": product_page_template["body"],
+                "product_page_footer": product_page_template["footer"],
                 "product": product,
+                "recommendations": recommendations,
             },
         )
+        if cache_key:
+            return store_page_response(request, response, cache_key, version)
+        return response
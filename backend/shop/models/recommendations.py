@@ -0,0 +1,50 @@
+"""shop/models/recommendations.py."""
+
+import logging
+
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+logger = logging.getLogger(__name__)
+
+# pylint: disable=too-few-public-methods
+
+
+class ProductRecommendation(models.Model):
+    """A product frequently bought together with another product.
+
+    Rows are precomputed from order history by ``shop.recommendations`` and
+    hold only the top recommendations of each product, ordered by ``rank``,
+    so the product page reads them with a single indexed lookup.
+    """
+
+    product = models.ForeignKey(
+        "shop.Product",
+        on_delete=models.CASCADE,
+        related_name="recommendations",
+        verbose_name=_("Товар"),
+    )
+    recommended = models.ForeignKey(
+        "shop.Product",
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name=_("Рекомендуемый товар"),
+    )
+    score = models.PositiveIntegerField(_("Заказов вместе"))
+    rank = models.PositiveSmallIntegerField(_("Позиция"))
+
+    class Meta:
+        """Meta options for the ProductRecommendation model."""
+
+        verbose_name = _("Рекомендация товара")
+        verbose_name_plural = _("Рекомендации товаров")
+        ordering = ["product", "rank"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "rank"], name="shop_recommendation_rank_uniq"
+            ),
+        ]
+
+    def __str__(self):
+        """Return string representation of the recommendation."""
+        return f"{self.product_id} -> {self.recommended_id} ({self.score})"
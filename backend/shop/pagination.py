@@ -0,0 +1,136 @@
+"""shop/pagination.py."""
+
+import base64
+import json
+import logging
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+class KeysetPage:
+    """A single page of keyset-paginated results.
+
+    Mirrors the parts of Django's ``Page`` API used by the templates, but
+    exposes an opaque ``next_cursor`` instead of page numbers.
+    """
+
+    def __init__(self, object_list, next_cursor):
+        """Store the page items and the cursor pointing past the last one."""
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        """Iterate over the items on this page."""
+        return iter(self.object_list)
+
+    def __len__(self):
+        """Return the number of items on this page."""
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        """Return the item (or slice of items) at the given index."""
+        return self.object_list[index]
+
+    def has_next(self):
+        """Return True if there are more items after this page."""
+        return self.next_cursor is not None
+
+
+class KeysetPaginator:
+    """Paginate a queryset by seeking past the last seen row.
+
+    Unlike ``django.core.paginator.Paginator`` this never issues a COUNT(*)
+    or an OFFSET scan: each page is a single ``WHERE (a, b) < (x, y)`` style
+    query that an index on the ordering columns can answer directly. The
+    ordering must end with a unique column (usually ``pk``) so that the
+    position encoded in a cursor is unambiguous.
+    """
+
+    def __init__(self, queryset, per_page, ordering):
+        """Initialize the paginator with a queryset and its keyset ordering."""
+        self.ordering = tuple(ordering)
+        self.queryset = queryset.order_by(*self.ordering)
+        self.per_page = per_page
+        opts = queryset.model._meta  # noqa: SLF001  # pylint: disable=protected-access
+        self.fields = [
+            opts.pk if name.lstrip("-") == "pk" else opts.get_field(name.lstrip("-"))
+            for name in self.ordering
+        ]
+
+    def encode_cursor(self, obj):
+        """Encode the ordering values of ``obj`` into an opaque cursor string."""
+        values = [field.value_to_string(obj) for field in self.fields]
+        raw = json.dumps(values, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        """Decode a cursor back into ordering values.
+
+        Raises InvalidCursorError if the cursor is malformed or does not match
+        the current ordering.
+        """
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded))
+        except ValueError as exc:
+            raise InvalidCursorError from exc
+
+        if not isinstance(values, list) or len(values) != len(self.fields):
+            raise InvalidCursorError
+        if any(value is None for value in values):
+            raise InvalidCursorError
+
+        try:
+            return [
+                field.to_python(value)
+                for field, value in zip(self.fields, values, strict=True)
+            ]
+        except ValidationError as exc:
+            raise InvalidCursorError from exc
+
+    def _seek_filter(self, values):
+        """Build a lexicographic 'after this row' filter for the ordering.
+
+        The OR of the tie-breaking branches cannot be used as an index
+        condition, so the filter is also bounded on the leading column; that
+        bound lets the index scan start at the cursor position.
+        """
+        condition = Q()
+        equal = Q()
+        for name, value in zip(self.ordering, values, strict=True):
+            field_name = name.lstrip("-")
+            lookup = "lt" if name.startswith("-") else "gt"
+            condition |= equal & Q(**{f"{field_name}__{lookup}": value})
+            equal &= Q(**{field_name: value})
+        first = self.ordering[0]
+        lookup = "lte" if first.startswith("-") else "gte"
+        return Q(**{f"{first.lstrip('-')}__{lookup}": values[0]}) & condition
+
+    def page(self, cursor=None):
+        """Return the page that starts right after ``cursor``.
+
+        An empty or malformed cursor yields the first page, in the same way
+        the catalog falls back to page 1 for an invalid page number.
+        """
+        queryset = self.queryset
+        if cursor:
+            try:
+                queryset = queryset.filter(
+                    self._seek_filter(self.decode_cursor(cursor))
+                )
+            except InvalidCursorError:
+                logger.warning("Ignoring invalid pagination cursor: %s", cursor)
+
+        items = list(queryset[: self.per_page + 1])
+        next_cursor = None
+        if len(items) > self.per_page:
+            items = items[: self.per_page]
+            next_cursor = self.encode_cursor(items[-1])
+        return KeysetPage(items, next_cursor)
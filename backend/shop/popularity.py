@@ -0,0 +1,59 @@
+"""shop/popularity.py."""
+
+import logging
+
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Value, When
+
+from .cache import bump_catalog_version
+from .models.listing import ProductListing
+from .models.products import Product
+
+# pylint: disable=no-member
+
+logger = logging.getLogger(__name__)
+
+# Ranks are multiplied by this factor once a day, i.e. sold units lose half
+# their weight after a week. The rank then approximates recent sales without
+# keeping a per-day history.
+SALES_RANK_DAILY_DECAY = 0.5 ** (1 / 7)
+# Ranks below this are reset to zero, so idle products stop being rewritten.
+SALES_RANK_MIN = 0.01
+
+
+def record_sales(quantities):
+    """Add sold units to the sales rank of products.
+
+    ``quantities`` maps product ids to units sold. The product and its
+    listing row are each updated with a single UPDATE, so this is cheap
+    enough to run inside the checkout transaction.
+    """
+    if not quantities:
+        return
+    increment = Case(
+        *(
+            When(pk=product_id, then=Value(float(quantity)))
+            for product_id, quantity in quantities.items()
+        ),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    for model in (Product, ProductListing):
+        model.objects.filter(pk__in=quantities).update(
+            sales_rank=F("sales_rank") + increment
+        )
+
+
+def decay_sales_rank(factor=SALES_RANK_DAILY_DECAY):
+    """Decay every sales rank by ``factor`` and refresh the cached catalog."""
+    with transaction.atomic():
+        for model in (Product, ProductListing):
+            model.objects.filter(sales_rank__gte=SALES_RANK_MIN).update(
+                sales_rank=F("sales_rank") * factor
+            )
+            model.objects.filter(
+                sales_rank__gt=0, sales_rank__lt=SALES_RANK_MIN
+            ).update(sales_rank=0)
+    logger.info("Decayed sales ranks by %.4f", factor)
+    # Cached "popular" pages are refreshed once a day, not on every order.
+    bump_catalog_version()
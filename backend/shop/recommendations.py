@@ -0,0 +1,74 @@
+"""shop/recommendations.py."""
+
+import logging
+from functools import partial
+
+from django.db import connection, transaction
+
+from .cache import bump_product_versions
+from .models import OrderItem, Product, ProductRecommendation
+
+# pylint: disable=no-member
+
+logger = logging.getLogger(__name__)
+
+RECOMMENDATIONS_PER_PRODUCT = 8
+
+# Counts, for every pair of products, the orders containing both, and keeps
+# the best pairs of each product. The self-join on order_id is the sparse
+# co-occurrence matrix; only pairs that were actually bought are produced.
+REBUILD_SQL = """
+    INSERT INTO {recommendation} (product_id, recommended_id, score, rank)
+    SELECT product_id, recommended_id, score, rank
+    FROM (
+        SELECT a.product_id,
+               b.product_id AS recommended_id,
+               COUNT(DISTINCT a.order_id) AS score,
+               ROW_NUMBER() OVER (
+                   PARTITION BY a.product_id
+                   ORDER BY COUNT(DISTINCT a.order_id) DESC, b.product_id
+               ) AS rank
+        FROM {item} a
+        JOIN {item} b
+          ON b.order_id = a.order_id AND b.product_id <> a.product_id
+        JOIN {product} p ON p.id = b.product_id AND p.live
+        WHERE a.product_id IS NOT NULL
+        GROUP BY a.product_id, b.product_id
+    ) pairs
+    WHERE rank <= %s
+"""
+
+
+def _table(model):
+    """Return the quoted database table name of a model."""
+    return connection.ops.quote_name(model._meta.db_table)  # noqa: SLF001
+
+
+def rebuild_product_recommendations(limit=RECOMMENDATIONS_PER_PRODUCT):
+    """Recompute the "frequently bought together" table from order history.
+
+    The whole computation runs in the database and replaces the table in one
+    transaction, so readers see either the old or the new recommendations.
+    The cached detail pages of products whose recommendations may have
+    changed are dropped once it commits. Returns the number of stored
+    recommendations.
+    """
+    sql = REBUILD_SQL.format(
+        recommendation=_table(ProductRecommendation),
+        item=_table(OrderItem),
+        product=_table(Product),
+    )
+    recommendations = ProductRecommendation.objects.all()
+    with transaction.atomic(), connection.cursor() as cursor:
+        product_ids = set(
+            recommendations.values_list("product_id", flat=True).distinct()
+        )
+        recommendations.delete()
+        cursor.execute(sql, [limit])
+        count = cursor.rowcount
+        product_ids.update(
+            recommendations.values_list("product_id", flat=True).distinct()
+        )
+        transaction.on_commit(partial(bump_product_versions, sorted(product_ids)))
+    logger.info("Rebuilt %d product recommendations", count)
+    return count
@@ -0,0 +1,39 @@
+"""shop/renderers.py."""
+
+import json
+import logging
+
+from django.core.serializers.json import DjangoJSONEncoder
+from ninja.renderers import BaseRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speed-up
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+_encoder = DjangoJSONEncoder()
+
+
+def dumps(data):
+    """Serialize data to compact JSON bytes.
+
+    Uses orjson when it is installed and falls back to the standard library
+    with Django's encoder (for Decimal, datetime, UUID and lazy strings).
+    """
+    if orjson is not None:
+        return orjson.dumps(data, default=_encoder.default)
+    return json.dumps(
+        data, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(",", ":")
+    ).encode()
+
+
+class FastJSONRenderer(BaseRenderer):
+    """Ninja renderer producing compact JSON through ``dumps``."""
+
+    media_type = "application/json"
+
+    def render(self, request, data, *, response_status):  # pylint: disable=unused-argument
+        """Render the response data."""
+        return dumps(data)
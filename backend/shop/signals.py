@@ -0,0 +1,263 @@
+"""shop/signals.py."""
+
+import logging
+from functools import partial
+from weakref import WeakKeyDictionary
+
+from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from wagtail.models import Page
+from wagtail.signals import page_published, page_unpublished, post_page_move
+
+from core.models import SiteSettings, SocialMediaLink
+
+from .cache import (
+    bump_cart_version,
+    bump_catalog_version,
+    bump_product_page_version,
+    bump_product_versions,
+)
+from .carts import persist_session_cart
+from .listing import rebuild_product_listings
+from .models import (
+    Cart,
+    CartItem,
+    Product,
+    ProductGalleryImage,
+    ProductPackaging,
+    ProductRecommendation,
+    ProductTaste,
+    ProductWeight,
+    ShopIndexPage,
+)
+
+logger = logging.getLogger(__name__)
+
+SNIPPET_PRODUCT_LOOKUPS = {
+    ProductTaste: "tastes",
+    ProductWeight: "weight_option",
+    ProductPackaging: "packaging",
+}
+
+
+class CatalogChanges:
+    """Catalog changes made in one transaction, applied once it commits.
+
+    Saving a product through the admin also saves each of its gallery images,
+    and every save fires the receivers below. They record the affected
+    product ids here, so a single callback rebuilds the read model, drops the
+    cached detail pages and bumps the catalog version for the whole
+    transaction.
+    """
+
+    def __init__(self, connection):
+        """Start an empty change set for a database connection."""
+        self.connection = connection
+        self.listing_ids = set()
+        self.page_ids = set()
+        self.bump_catalog = False
+        self.applied = False
+
+    def is_pending(self):
+        """Return True while the commit callback is waiting to be run."""
+        return not self.applied and any(
+            func is self for _sids, func, _robust in self.connection.run_on_commit
+        )
+
+    def __call__(self):
+        """Apply the recorded changes after the transaction has committed."""
+        self.applied = True
+        if _catalog_changes.get(self.connection) is self:
+            del _catalog_changes[self.connection]
+
+        if self.listing_ids:
+            rebuild_product_listings(sorted(self.listing_ids))
+        # A product is shown on its own page and among the recommendations of
+        # the products it is bought with, so the pages of those are dropped.
+        page_ids = self.page_ids | self.listing_ids
+        page_ids.update(
+            ProductRecommendation.objects.filter(
+                recommended_id__in=page_ids
+            ).values_list("product_id", flat=True)
+        )
+        if page_ids:
+            bump_product_versions(sorted(page_ids))
+        if self.bump_catalog or self.listing_ids:
+            bump_catalog_version()
+
+
+_catalog_changes = WeakKeyDictionary()
+
+
+def record_catalog_changes(listing_ids=(), page_ids=(), *, bump_catalog=False):
+    """Record catalog changes to apply when the current transaction commits.
+
+    The first change of a transaction registers the commit callback; outside
+    a transaction it runs right away.
+    """
+    connection = transaction.get_connection()
+    changes = _catalog_changes.get(connection)
+    is_new = changes is None or not changes.is_pending()
+    if is_new:
+        changes = _catalog_changes[connection] = CatalogChanges(connection)
+    changes.listing_ids.update(listing_ids)
+    changes.page_ids.update(page_ids)
+    changes.bump_catalog |= bump_catalog
+    if is_new:
+        transaction.on_commit(changes)
+
+
+def schedule_product_page_purge(product_ids):
+    """Drop the cached detail pages showing products once the transaction commits."""
+    record_catalog_changes(page_ids=product_ids)
+
+
+def schedule_listing_rebuild(product_ids):
+    """Rebuild the catalog read model for products once the transaction commits.
+
+    The cached detail pages of the products are dropped at the same time.
+    """
+    record_catalog_changes(listing_ids=product_ids)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductTaste)
+@receiver(post_delete, sender=ProductTaste)
+@receiver(post_save, sender=ProductWeight)
+@receiver(post_delete, sender=ProductWeight)
+@receiver(post_save, sender=ProductPackaging)
+@receiver(post_delete, sender=ProductPackaging)
+@receiver(post_save, sender=ProductGalleryImage)
+@receiver(post_delete, sender=ProductGalleryImage)
+@receiver(post_save, sender=ShopIndexPage)
+@receiver(post_delete, sender=ShopIndexPage)
+def invalidate_catalog_cache(sender, **kwargs):  # pylint: disable=unused-argument
+    """Bump the catalog version once the surrounding transaction commits."""
+    logger.debug("Catalog change detected on %s", sender.__name__)
+    record_catalog_changes(bump_catalog=True)
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+@receiver(post_page_move)
+@receiver(post_delete, sender=Page)
+@receiver(post_save, sender=SiteSettings)
+@receiver(post_delete, sender=SiteSettings)
+@receiver(post_save, sender=SocialMediaLink)
+@receiver(post_delete, sender=SocialMediaLink)
+def invalidate_cached_layout(sender, **kwargs):  # pylint: disable=unused-argument
+    """Drop the cached catalog and product pages after a layout change.
+
+    Both are cached with the site header and footer, whose menu is built
+    from the live pages of the tree and whose contents come from the site
+    settings. The footer imports its contacts from a ContactPage, and the
+    cached ProductPage blocks go stale with any ProductPage publish.
+    """
+    if sender is SiteSettings and kwargs.get("created"):
+        # The settings are created with their defaults on the first request
+        # that reads them, so the pages rendered before show the same values.
+        return
+    record_catalog_changes(bump_catalog=True)
+    transaction.on_commit(bump_product_page_version)
+
+
+@receiver(m2m_changed, sender=Product.tastes.through)
+def invalidate_catalog_cache_on_tastes_change(sender, action, **kwargs):
+    """Sync ``Product.taste_ids`` and bump the catalog version after a change."""
+    if not action.startswith("post_"):
+        return
+
+    instance = kwargs["instance"]
+    if isinstance(instance, Product):
+        products = Product.objects.filter(pk=instance.pk)
+    elif kwargs["pk_set"]:
+        products = Product.objects.filter(pk__in=kwargs["pk_set"])
+    else:
+        products = Product.objects.filter(taste_ids__contains=[instance.pk])
+
+    product_ids = list(products.values_list("id", flat=True))
+    if not product_ids:
+        return
+    Product.objects.filter(id__in=product_ids).sync_taste_ids()
+    invalidate_catalog_cache(sender, **kwargs)
+    schedule_listing_rebuild(product_ids)
+
+
+@receiver(post_delete, sender=ProductTaste)
+def sync_taste_ids_on_taste_delete(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Drop a deleted taste from the denormalized ``taste_ids`` arrays."""
+    Product.objects.filter(taste_ids__contains=[instance.pk]).sync_taste_ids()
+
+
+@receiver(post_save, sender=Product)
+def rebuild_listing_on_product_save(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Refresh the read-model row of a saved product."""
+    schedule_listing_rebuild([instance.pk])
+
+
+@receiver(pre_delete, sender=Product)
+def purge_product_pages_on_product_delete(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Drop the cached pages recommending a product before it is deleted.
+
+    The recommendations are deleted along with the product, so they are
+    looked up while they still exist.
+    """
+    schedule_product_page_purge(
+        ProductRecommendation.objects.filter(recommended=instance).values_list(
+            "product_id", flat=True
+        )
+    )
+
+
+@receiver(post_save, sender=ProductGalleryImage)
+@receiver(post_delete, sender=ProductGalleryImage)
+def rebuild_listing_on_gallery_change(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Refresh the card images of a product after its gallery changed."""
+    schedule_listing_rebuild([instance.product_id])
+
+
+@receiver(post_save, sender=ProductTaste)
+@receiver(post_save, sender=ProductWeight)
+@receiver(post_save, sender=ProductPackaging)
+@receiver(pre_delete, sender=ProductTaste)
+@receiver(pre_delete, sender=ProductWeight)
+@receiver(pre_delete, sender=ProductPackaging)
+def rebuild_listing_on_snippet_change(sender, instance, **kwargs):
+    """Refresh the cards that display a renamed or removed snippet.
+
+    The affected ids are collected before a delete, since the relation is
+    cleared (or nulled) by the time the transaction commits.
+    """
+    lookup = SNIPPET_PRODUCT_LOOKUPS[sender]
+    schedule_listing_rebuild(
+        Product.objects.filter(**{lookup: instance}).values_list("id", flat=True)
+    )
+
+
+@receiver(post_save, sender=Cart)
+@receiver(post_delete, sender=Cart)
+def invalidate_cart_etag(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Bump the cart version once the surrounding transaction commits."""
+    transaction.on_commit(partial(bump_cart_version, instance))
+
+
+@receiver(post_save, sender=CartItem)
+@receiver(post_delete, sender=CartItem)
+def invalidate_cart_etag_on_item_change(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Bump the version of the cart an item was added to, changed or removed from."""
+    if CartItem.cart.is_cached(instance):
+        cart = instance.cart
+    else:
+        cart = Cart.objects.filter(pk=instance.cart_id).first()
+    if cart is not None:
+        transaction.on_commit(partial(bump_cart_version, cart))
+
+
+@receiver(user_logged_in)
+def persist_session_cart_on_login(sender, request, user, **kwargs):  # pylint: disable=unused-argument
+    """Move the cart a visitor filled before logging in into their user cart."""
+    if request is not None:
+        persist_session_cart(request, user)
@@ -0,0 +1,32 @@
+"""shop/tasks.py."""
+
+import logging
+
+from celery import shared_task
+
+from .popularity import decay_sales_rank
+from .recommendations import rebuild_product_recommendations
+from .warmup import warm_catalog_cache
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def rebuild_product_recommendations_task():
+    """Async task to recompute the "frequently bought together" table."""
+    logger.info("Starting product recommendations rebuild")
+    return rebuild_product_recommendations()
+
+
+@shared_task
+def decay_sales_rank_task():
+    """Async task to apply the daily decay to the product sales ranks."""
+    logger.info("Starting sales rank decay")
+    decay_sales_rank()
+
+
+@shared_task
+def warm_catalog_cache_task():
+    """Async task to render the most requested catalog pages into the cache."""
+    logger.info("Starting catalog cache warmup")
+    return warm_catalog_cache()
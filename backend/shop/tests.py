@@ -1 +1,1176 @@
 """shop/tests.py."""
+
+import shutil
+import tempfile
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import translation
+from django_redis import get_redis_connection
+from wagtail.images import get_image_model
+from wagtail.images.tests.utils import get_test_image_file
+from wagtail.models import Page, Site
+from wagtail.test.utils import WagtailPageTestCase
+
+from core.models import SiteSettings
+from home.models import HomePage
+from shop.admin import ProductAdmin
+from shop.cache import (
+    CSRF_TOKEN_PLACEHOLDER,
+    bump_catalog_version,
+    get_cached_catalog_page,
+)
+from shop.carts import MAX_LINE_QUANTITY, SESSION_CART_KEY
+from shop.facets import get_catalog_facets, get_price_histogram
+from shop.listing import rebuild_product_listings
+from shop.models import (
+    Cart,
+    CartItem,
+    CartPage,
+    CheckoutPage,
+    Order,
+    OrderItem,
+    Product,
+    ProductGalleryImage,
+    ProductListing,
+    ProductRecommendation,
+    ProductTaste,
+    ProductWeight,
+    ShopIndexPage,
+)
+from shop.models.products import CATALOG_ORDERINGS, ProductPage
+from shop.pagination import KeysetPaginator
+from shop.popularity import decay_sales_rank, record_sales
+from shop.recommendations import rebuild_product_recommendations
+from shop.warmup import get_hot_catalog_urls, warm_catalog_cache
+
+
+class TemporaryMediaMixin:
+    """Store the files and renditions of test images in a temporary MEDIA_ROOT."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Point MEDIA_ROOT at a directory removed after the class has run."""
+        media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_settings = override_settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        cls.addClassCleanup(media_settings.disable)
+        super().setUpClass()
+
+
+class CatalogSiteTestCase(WagtailPageTestCase):
+    """Base for tests served by a default site with a home and a catalog page."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create the default site, its home page and the catalog page."""
+        super().setUpTestData()
+        with cls.captureOnCommitCallbacks(execute=True):
+            root_page = Page.get_first_root_node()
+            Site.objects.create(
+                hostname="testsite", root_page=root_page, is_default_site=True
+            )
+            cls.homepage = HomePage(title="Home")
+            root_page.add_child(instance=cls.homepage)
+            cls.shop_page = ShopIndexPage(title="Shop")
+            cls.homepage.add_child(instance=cls.shop_page)
+
+    def setUp(self):
+        """Start every test with an empty cache."""
+        cache.clear()
+
+
+class ShopIndexPageTests(TemporaryMediaMixin, CatalogSiteTestCase):
+    """Tests for the catalog listing served by ShopIndexPage."""
+
+    def setUp(self):
+        """Create an image for the product galleries."""
+        super().setUp()
+        self.image = get_image_model().objects.create(
+            title="Nut", file=get_test_image_file()
+        )
+
+    def create_products(self, count, start=0):
+        """Create live products, each with a two-image gallery."""
+        for index in range(start, start + count):
+            product = Product.objects.create(
+                title=f"Product {index}", slug=f"product-{index}", price=100 + index
+            )
+            for sort_order in range(2):
+                ProductGalleryImage.objects.create(
+                    product=product, image=self.image, sort_order=sort_order
+                )
+
+    def count_listing_queries(self):
+        """Return the number of queries issued by an HTMX catalog request."""
+        headers = {"HX-Request": "true"}
+        self.client.get(self.shop_page.url, headers=headers)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.shop_page.url, headers=headers)
+        assert response.status_code == HTTPStatus.OK
+        return len(queries)
+
+    @override_settings(SHOP_CATALOG_PAGE_CACHE=False)
+    def test_listing_query_count_is_constant(self):
+        """Test that the product grid does not issue per-product queries."""
+        self.create_products(2)
+        small_page_queries = self.count_listing_queries()
+
+        self.create_products(6, start=2)
+        full_page_queries = self.count_listing_queries()
+
+        assert small_page_queries == full_page_queries
+
+    @override_settings(SHOP_CATALOG_PAGE_CACHE=False)
+    def test_facets_follow_filter_changes_only(self):
+        """Test that filter changes swap the sidebar and "Show more" skips it."""
+        # The swap target exists even when the catalog starts out empty.
+        self.assertContains(self.client.get(self.shop_page.url), 'id="price-histogram"')
+        self.create_products(12)
+        headers = {"HX-Request": "true"}
+        response = self.client.get(self.shop_page.url, headers=headers)
+        self.assertContains(response, 'id="taste-select" hx-swap-oob="innerHTML"')
+        self.assertContains(response, 'id="price-histogram" hx-swap-oob="innerHTML"')
+        cursor = response.context["products"].next_cursor
+
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                self.shop_page.url, {"cursor": cursor}, headers=headers
+            )
+        self.assertContains(response, "Product")
+        self.assertNotContains(response, "hx-swap-oob")
+        # Facet counts and the histogram are the only aggregate queries.
+        assert not any("FILTER (WHERE" in q["sql"] for q in queries)
+        assert not any("MIN(" in q["sql"] for q in queries)
+
+    def test_keyset_pages_cover_catalog_once(self):
+        """Test that following cursors visits every product exactly once."""
+        self.create_products(7)
+        Product.objects.update(price=100)
+
+        seen = []
+        cursor = None
+        while True:
+            paginator = KeysetPaginator(
+                Product.objects.all(), 3, CATALOG_ORDERINGS["price_asc"]
+            )
+            page = paginator.page(cursor)
+            seen.extend(product.id for product in page)
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+
+        assert sorted(seen) == sorted(Product.objects.values_list("id", flat=True))
+        assert len(seen) == len(set(seen))
+
+    def test_seek_is_bounded_on_the_leading_column(self):
+        """Test that a cursor bounds the first ordering column for the index."""
+        self.create_products(2)
+        for ordering, bound in (
+            ("default", '"created_at" <='),
+            ("price_asc", '"price" >='),
+        ):
+            paginator = KeysetPaginator(
+                Product.objects.all(), 1, CATALOG_ORDERINGS[ordering]
+            )
+            cursor = paginator.page().next_cursor
+            with CaptureQueriesContext(connection) as queries:
+                assert len(paginator.page(cursor)) == 1
+            assert bound in queries[0]["sql"]
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        """Test that a tampered cursor returns the first page."""
+        self.create_products(2)
+        paginator = KeysetPaginator(
+            Product.objects.all(), 1, CATALOG_ORDERINGS["default"]
+        )
+        assert list(paginator.page("not-a-cursor")) == list(paginator.page())
+
+    def test_anonymous_responses_are_cached_per_catalog_version(self):
+        """Test that repeated anonymous requests are served from the cache."""
+        self.create_products(1)
+        headers = {"HX-Request": "true"}
+        self.client.get(self.shop_page.url, headers=headers)
+
+        Product.objects.update(title="Renamed")
+        with CaptureQueriesContext(connection) as queries:
+            cached = self.client.get(self.shop_page.url, headers=headers)
+        assert not [q for q in queries.captured_queries if '"shop_product' in q["sql"]]
+        self.assertContains(cached, "Product 0")
+        self.assertNotContains(cached, CSRF_TOKEN_PLACEHOLDER)
+
+        bump_catalog_version()
+        self.assertContains(
+            self.client.get(self.shop_page.url, headers=headers), "Renamed"
+        )
+
+    def test_page_cache_is_dropped_on_layout_changes(self):
+        """Test that menu and site settings changes refresh the cached page."""
+        self.client.get(self.shop_page.url)
+
+        site_settings = SiteSettings.for_site(self.shop_page.get_site())
+        site_settings.logo_text = "Cached Nuts"
+        with self.captureOnCommitCallbacks(execute=True):
+            site_settings.save()
+        self.assertContains(self.client.get(self.shop_page.url), "Cached Nuts")
+
+        page = Page(title="Delivery terms", slug="delivery", show_in_menus=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            Page.get_first_root_node().add_child(instance=page)
+            page.save_revision().publish()
+        self.assertContains(self.client.get(self.shop_page.url), "Delivery terms")
+
+    def test_page_cache_is_keyed_by_the_filter_state(self):
+        """Test that equivalent queries share an entry and malformed ones skip it."""
+
+        def cache_key(query):
+            request = RequestFactory().get(f"/?{query}")
+            request.user = AnonymousUser()
+            return self.shop_page.get_page_cache_key(request)
+
+        assert cache_key("taste=2,1&taste=1&price_max=") == cache_key("taste=1,2")
+        for query in (
+            "price_min=abc",
+            "taste=1,x",
+            "sort=cheap",
+            "sort=new&sort=price_asc",
+            "page=0",
+            "cursor=bogus",
+        ):
+            assert cache_key(query) is None, query
+
+        self.create_products(1)
+        self.client.get(self.shop_page.url, {"page": 1})
+        self.client.get(self.shop_page.url, {"page": 99})
+        with translation.override("ru"):
+            assert get_cached_catalog_page(cache_key("page=1"))[0] is not None
+            assert get_cached_catalog_page(cache_key("page=99"))[0] is None
+
+    def test_fragment_answers_if_none_match_with_304(self):
+        """Test that an unchanged product list fragment is not re-sent."""
+        self.create_products(1)
+        headers = {"HX-Request": "true"}
+        self.client.get(self.shop_page.url, headers=headers)  # sets the CSRF cookie
+        response = self.client.get(self.shop_page.url, headers=headers)
+        etag = response.headers["ETag"]
+
+        not_modified = self.client.get(
+            self.shop_page.url, headers={**headers, "If-None-Match": etag}
+        )
+        assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+        assert not not_modified.content
+
+        bump_catalog_version()
+        response = self.client.get(
+            self.shop_page.url, headers={**headers, "If-None-Match": etag}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.headers["ETag"] != etag
+
+    def test_catalog_changes_are_applied_once_per_transaction(self):
+        """Test that a product and its gallery saves share one commit callback."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_products(1)
+        product = Product.objects.get()
+
+        with (
+            self.captureOnCommitCallbacks(execute=True) as callbacks,
+            transaction.atomic(),
+        ):
+            product.title = "Renamed"
+            product.save()
+            for gallery_image in product.gallery_images.all():
+                gallery_image.save()
+        assert len(callbacks) == 1
+        assert ProductListing.objects.get(product=product).title == "Renamed"
+
+    def test_published_products_get_listings(self):
+        """Test that the admin publish action lists the products it hid before."""
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(title="Hidden", slug="hidden", price=1, live=False)
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            ProductAdmin(Product, admin.site).make_published(
+                request, Product.objects.filter(live=False)
+            )
+        assert len(callbacks) == 1
+        assert ProductListing.objects.filter(product__slug="hidden").exists()
+
+    @override_settings(SHOP_CATALOG_READ_MODEL=True)
+    def test_read_model_serves_catalog_cards(self):
+        """Test that the grid is rendered from ProductListing rows."""
+        self.create_products(2)
+        taste = ProductTaste.objects.create(name_ru="Солёный", name_en="Salted")
+        product = Product.objects.get(slug="product-0")
+        product.tastes.add(taste)
+        Product.objects.create(title="Hidden", slug="hidden", price=1, live=False)
+        rebuild_product_listings(Product.objects.values_list("id", flat=True))
+
+        assert ProductListing.objects.count() == 2  # noqa: PLR2004
+        listing = ProductListing.objects.get(product=product)
+        assert listing.taste_ids == [taste.id]
+        assert listing.taste_names_en == "Salted"
+        assert len(listing.images) == 2  # noqa: PLR2004
+
+        response = self.client.get(
+            self.shop_page.url, {"taste": taste.id}, headers={"HX-Request": "true"}
+        )
+        assert response.status_code == HTTPStatus.OK
+        self.assertContains(response, "Product 0")
+        self.assertContains(response, listing.images[0]["url"])
+        self.assertNotContains(response, "Product 1")
+
+    def test_popular_sort_follows_recorded_sales(self):
+        """Test that sold units reorder the catalog and decay over time."""
+        self.create_products(3)
+        first, second, third = (
+            Product.objects.get(slug=f"product-{index}") for index in range(3)
+        )
+        rebuild_product_listings([first.id, second.id, third.id])
+        record_sales({second.id: 3, third.id: 1})
+        record_sales({third.id: 1})
+
+        for read_model in (False, True):
+            with self.settings(
+                SHOP_CATALOG_READ_MODEL=read_model, SHOP_CATALOG_PAGE_CACHE=False
+            ):
+                response = self.client.get(
+                    self.shop_page.url,
+                    {"sort": "popular"},
+                    headers={"HX-Request": "true"},
+                )
+            titles = [card.title for card in response.context["products"]]
+            assert titles == ["Product 1", "Product 2", "Product 0"]
+
+        decay_sales_rank(factor=0.5)
+        second.refresh_from_db()
+        listing = ProductListing.objects.get(product=second)
+        assert second.sales_rank == listing.sales_rank == 1.5  # noqa: PLR2004
+
+
+class CatalogFacetsTests(WagtailPageTestCase):
+    """Tests for taste and weight facet counts."""
+
+    def setUp(self):
+        """Create tastes, weights and products covering several combinations."""
+        cache.clear()
+        self.salted = ProductTaste.objects.create(name="Salted")
+        self.sweet = ProductTaste.objects.create(name="Sweet")
+        self.small = ProductWeight.objects.create(name="100g", value=100)
+        self.large = ProductWeight.objects.create(name="200g", value=200)
+
+        combinations = [
+            ([self.salted], self.small),
+            ([self.salted, self.sweet], self.small),
+            ([self.sweet], self.large),
+        ]
+        for index, (tastes, weight) in enumerate(combinations):
+            product = Product.objects.create(
+                title=f"Product {index}",
+                slug=f"product-{index}",
+                price=100,
+                weight_option=weight,
+            )
+            product.tastes.set(tastes)
+        Product.objects.create(title="Hidden", slug="hidden", price=1, live=False)
+
+    @staticmethod
+    def counts(facets, name):
+        """Map facet ids to their product counts."""
+        return {item["id"]: item["count"] for item in facets[name]}
+
+    def test_unfiltered_counts(self):
+        """Test that each option counts distinct live products."""
+        facets = get_catalog_facets()
+        assert self.counts(facets, "tastes") == {self.salted.id: 2, self.sweet.id: 2}
+        assert self.counts(facets, "weights") == {self.small.id: 2, self.large.id: 1}
+
+    def test_counts_respect_the_other_filter(self):
+        """Test that each facet is narrowed by the other active filter."""
+        facets = get_catalog_facets(
+            taste_ids=[self.sweet.id], weight_ids=[self.small.id]
+        )
+        assert self.counts(facets, "tastes") == {self.salted.id: 2, self.sweet.id: 1}
+        assert self.counts(facets, "weights") == {self.small.id: 1, self.large.id: 1}
+
+    def test_taste_ids_follow_the_tastes_relation(self):
+        """Test that the denormalized taste ids track M2M changes and deletes."""
+        product = Product.objects.get(slug="product-1")
+        assert product.taste_ids == sorted([self.salted.id, self.sweet.id])
+
+        self.sweet.delete()
+        product.refresh_from_db()
+        assert product.taste_ids == [self.salted.id]
+
+    def test_taste_ids_are_synced_by_one_statement(self):
+        """Test that a bulk taste change updates all products in one UPDATE."""
+        salty = ProductTaste.objects.create(name="Salty")
+        with CaptureQueriesContext(connection) as queries:
+            salty.product_set.set(Product.objects.all())
+        updates = [
+            query["sql"]
+            for query in queries
+            if query["sql"].lstrip().startswith("UPDATE")
+            and "taste_ids" in query["sql"]
+        ]
+        assert len(updates) == 1
+        assert all(
+            salty.id in taste_ids
+            for taste_ids in Product.objects.values_list("taste_ids", flat=True)
+        )
+
+        salty.product_set.clear()
+        assert Product.objects.filter(taste_ids=[]).count() == 1
+
+        unused = ProductTaste.objects.create(name="Unused")
+        unused.product_set.clear()
+        Product.objects.none().sync_taste_ids()
+
+    def test_multi_select_filters_match_any_option(self):
+        """Test that several tastes and weights are OR-ed without duplicates."""
+        products = (
+            Product.objects.filter(live=True)
+            .filter_catalog(
+                [self.salted.id, self.sweet.id], [self.small.id, self.large.id]
+            )
+            .values_list("slug", flat=True)
+        )
+        assert sorted(products) == ["product-0", "product-1", "product-2"]
+
+        facets = get_catalog_facets(taste_ids=[self.salted.id, self.sweet.id])
+        assert self.counts(facets, "weights") == {self.small.id: 2, self.large.id: 1}
+
+    def test_price_range_and_histogram(self):
+        """Test the price filter and the histogram built for a filter state."""
+        Product.objects.filter(slug="product-2").update(price=300)
+
+        facets = get_catalog_facets(max_price=150)
+        assert self.counts(facets, "tastes") == {self.salted.id: 2, self.sweet.id: 1}
+
+        histogram = get_price_histogram(buckets=2)
+        assert (histogram["min"], histogram["max"]) == (100, 300)
+        assert [bucket["count"] for bucket in histogram["buckets"]] == [2, 1]
+
+        histogram = get_price_histogram(taste_ids=[self.salted.id])
+        assert (histogram["min"], histogram["max"]) == (100, 100)
+        assert [bucket["count"] for bucket in histogram["buckets"]] == [2]
+
+
+class CartFragmentTests(WagtailPageTestCase):
+    """Tests for the conditional cart fragment endpoints."""
+
+    def setUp(self):
+        """Create a product and open a session with an empty cart."""
+        cache.clear()
+        self.product = Product.objects.create(title="Nut", slug="nut", price=100)
+        self.client.get("/shop/api/cart/count/")
+
+    def test_cart_count_etag_changes_with_the_cart(self):
+        """Test that the counter is revalidated until the cart changes."""
+        response = self.client.get("/shop/api/cart/count/")
+        etag = response.headers["ETag"]
+        headers = {"If-None-Match": etag}
+
+        response = self.client.get("/shop/api/cart/count/", headers=headers)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/shop/api/cart/add/{self.product.id}/")
+
+        response = self.client.get("/shop/api/cart/count/", headers=headers)
+        assert response.status_code == HTTPStatus.OK
+        self.assertContains(response, ">1<")
+
+
+class CatalogApiTests(TemporaryMediaMixin, WagtailPageTestCase):
+    """Tests for the versioned JSON catalog API."""
+
+    def setUp(self):
+        """Create a few live products and a hidden one."""
+        cache.clear()
+        for index in range(3):
+            Product.objects.create(
+                title=f"Product {index}", slug=f"product-{index}", price=100 + index
+            )
+        self.hidden = Product.objects.create(
+            title="Hidden", slug="hidden", price=1, live=False
+        )
+
+    def test_listing_supports_cursor_and_sparse_fields(self):
+        """Test cursor pagination and field selection on the product list."""
+        url = "/shop/api/v1/products/"
+        first = self.client.get(url, {"limit": 2, "fields": "id,price"}).json()
+        assert len(first["items"]) == 2  # noqa: PLR2004
+        assert set(first["items"][0]) == {"id", "price"}
+
+        second = self.client.get(
+            url, {"limit": 2, "fields": "id,price", "cursor": first["next_cursor"]}
+        ).json()
+        assert second["next_cursor"] is None
+        ids = [item["id"] for item in first["items"] + second["items"]]
+        assert sorted(ids) == sorted(
+            Product.objects.filter(live=True).values_list("id", flat=True)
+        )
+
+    def test_detail_hides_unpublished_products(self):
+        """Test that hidden products are not exposed through the API."""
+        product = Product.objects.get(slug="product-0")
+        response = self.client.get(f"/shop/api/v1/products/{product.id}/")
+        assert response.json()["title"] == "Product 0"
+
+        response = self.client.get(f"/shop/api/v1/products/{self.hidden.id}/")
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def count_detail_queries(self, product):
+        """Return the number of queries of an uncached product detail request."""
+        url = f"/shop/api/v1/products/{product.id}/"
+        cache.clear()
+        self.client.get(url)  # generates the renditions
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        assert len(response.json()["images"]) == product.gallery_images.count()
+        return len(queries)
+
+    def test_detail_query_count_is_fixed(self):
+        """Test that gallery images add no queries to the product detail."""
+        product = Product.objects.get(slug="product-0")
+        for sort_order in range(4):
+            image = get_image_model().objects.create(
+                title=f"Nut {sort_order}", file=get_test_image_file()
+            )
+            ProductGalleryImage.objects.create(
+                product=product, image=image, sort_order=sort_order
+            )
+            if sort_order == 0:
+                one_image_queries = self.count_detail_queries(product)
+        assert self.count_detail_queries(product) == one_image_queries
+
+        # Sparse fieldsets skip the work of the fields left out.
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                f"/shop/api/v1/products/{product.id}/", {"fields": "id,title"}
+            )
+        assert response.json() == {"id": product.id, "title": "Product 0"}
+        assert not any("wagtailimages_rendition" in q["sql"] for q in queries)
+
+    def test_cart_answers_not_modified(self):
+        """Test that a repeat cart request with the same ETag gets a 304."""
+        url = "/shop/api/v1/cart/"
+        self.client.get(url)
+        response = self.client.get(url)
+        assert response.json()["total_items"] == 0
+        etag = response["ETag"]
+
+        response = self.client.get(url, headers={"if-none-match": etag})
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+class AutocompleteTests(WagtailPageTestCase):
+    """Tests for the trigram-backed product typeahead."""
+
+    url = "/shop/api/autocomplete/"
+
+    def setUp(self):
+        """Create products with titles in several languages."""
+        cache.clear()
+        Product.objects.create(
+            title="Грецкий орех",
+            title_uk="Волоський горіх",
+            title_en="Walnut",
+            slug="walnut",
+            sku="NUT-001",
+            price=250,
+        )
+        Product.objects.create(
+            title="Миндаль", title_en="Almond", slug="almond", sku="NUT-002", price=300
+        )
+        Product.objects.create(
+            title="Скрытый орех", slug="hidden-nut", price=1, live=False
+        )
+
+    def titles(self, term):
+        """Return the titles suggested for a term."""
+        response = self.client.get(self.url, {"q": term})
+        return [item["title"] for item in response.json()["items"]]
+
+    def test_matches_prefixes_in_any_language_and_sku(self):
+        """Test prefix matches on every translated title and on the SKU."""
+        assert self.titles("wal") == ["Грецкий орех"]
+        assert self.titles("nut-002")[0] == "Миндаль"
+        assert self.titles("nut") == ["Грецкий орех", "Миндаль"]
+        assert self.titles("a") == []
+
+    def test_matches_misspelled_terms(self):
+        """Test that a typo still finds the product through trigram similarity."""
+        assert self.titles("walnutt") == ["Грецкий орех"]
+
+    def test_results_are_cached_per_term(self):
+        """Test that a repeated term is answered without product queries."""
+        self.titles("almo")
+        with CaptureQueriesContext(connection) as queries:
+            assert self.titles(" ALMO ") == ["Миндаль"]
+        assert not any("shop_product" in query["sql"] for query in queries)
+
+
+class ProductSearchTests(WagtailPageTestCase):
+    """Tests for the full-text product search."""
+
+    def setUp(self):
+        """Create products with English titles and compositions."""
+        self.almonds = Product.objects.create(
+            title="Миндаль",
+            title_en="Roasted almonds",
+            slug="almonds",
+            price=300,
+        )
+        self.mix = Product.objects.create(
+            title="Микс",
+            title_en="Nut mix",
+            composition_en="Cashews, walnuts and an almond",
+            slug="mix",
+            price=200,
+        )
+
+    def test_search_stems_and_ranks_title_matches_first(self):
+        """Test stemming and that title matches outrank composition matches."""
+        results = list(Product.objects.search("almond", language="en"))
+        assert results == [self.almonds, self.mix]
+        assert list(Product.objects.search("walnut", language="en")) == [self.mix]
+        assert not Product.objects.search("almond -roasted", language="en").exclude(
+            pk=self.mix.pk
+        )
+
+    def test_search_view_lists_products(self):
+        """Test that the site search shows matching products."""
+        with translation.override("en"):
+            response = self.client.get("/en/search/", {"query": "almonds"})
+        assert response.status_code == HTTPStatus.OK
+        assert response.context["product_results"][0] == self.almonds
+
+
+class RecommendationTests(CatalogSiteTestCase):
+    """Tests for the "frequently bought together" recommendations."""
+
+    def setUp(self):
+        """Create products bought in a few orders."""
+        super().setUp()
+        self.walnut, self.almond, self.cashew, self.hidden = (
+            Product.objects.create(title=title, slug=title, price=100, live=live)
+            for title, live in (
+                ("walnut", True),
+                ("almond", True),
+                ("cashew", True),
+                ("hidden", False),
+            )
+        )
+        baskets = [
+            [self.walnut, self.almond],
+            [self.walnut, self.almond, self.cashew],
+            [self.walnut, self.cashew, self.hidden],
+            [self.almond, self.walnut],
+        ]
+        for number, products in enumerate(baskets):
+            order = Order.objects.create(
+                order_number=f"N{number}",
+                total_amount=100,
+                first_name="Test",
+                phone="+380000000000",
+                email="test@example.com",
+            )
+            for product in products:
+                OrderItem.objects.create(
+                    order=order, product=product, product_name=product.title, price=100
+                )
+
+    def test_rebuild_ranks_pairs_by_shared_orders(self):
+        """Test co-occurrence counting, ranking, the limit and hidden products."""
+        rebuild_product_recommendations(limit=2)
+
+        rows = ProductRecommendation.objects.filter(product=self.walnut)
+        assert [(row.recommended, row.score) for row in rows] == [
+            (self.almond, 3),
+            (self.cashew, 2),
+        ]
+        assert not ProductRecommendation.objects.filter(recommended=self.hidden)
+
+    def test_product_detail_reads_recommendations(self):
+        """Test that the product page lists the precomputed recommendations."""
+        rebuild_product_recommendations()
+
+        response = self.client.get(f"{self.shop_page.url}walnut/")
+        assert response.status_code == HTTPStatus.OK
+        assert response.context["recommendations"] == [self.almond, self.cashew]
+
+
+class CatalogWarmupTests(CatalogSiteTestCase):
+    """Tests for the request stats and the catalog cache warmer."""
+
+    def setUp(self):
+        """Create a product."""
+        super().setUp()
+        Product.objects.create(title="Walnut", slug="walnut", price=100)
+
+    @override_settings(SHOP_CATALOG_WARMUP=True)
+    def test_hot_urls_are_learned_from_requests(self):
+        """Test that hits are counted per normalized listing URL."""
+        url = self.shop_page.url
+        for _attempt in range(2):
+            self.client.get(url, {"sort": "price_asc", "utm_source": "mail"})
+        self.client.get(url, headers={"HX-Request": "true"})
+
+        path = urlsplit(url).path
+        assert get_hot_catalog_urls("ru") == [
+            (False, "testserver", f"{path}?sort=price_asc"),
+            (True, "testserver", path),
+        ]
+
+    @override_settings(SHOP_CATALOG_WARMUP=True)
+    def test_warmup_renders_hot_pages_into_the_cache(self):
+        """Test that a visitor gets a warmed page without catalog queries."""
+        url = self.shop_page.url
+        self.client.get(url, {"sort": "price_asc"})
+        bump_catalog_version()
+
+        assert warm_catalog_cache() == 1
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {"sort": "price_asc"})
+        assert response.status_code == HTTPStatus.OK
+        assert not any("shop_product" in query["sql"] for query in queries)
+
+
+class ProductSlugTests(CatalogSiteTestCase):
+    """Tests for resolving product detail slugs in any language."""
+
+    def setUp(self):
+        """Create a product with translated slugs."""
+        super().setUp()
+        self.product = Product.objects.create(
+            title="Грецкий орех", slug="oreh", slug_en="walnut", price=100
+        )
+
+    def test_other_language_slug_redirects_to_canonical_url(self):
+        """Test that a slug from another language gets a permanent redirect."""
+        url = self.shop_page.url
+        response = self.client.get(f"{url}walnut/", {"ref": "mail"})
+        assert response.status_code == HTTPStatus.MOVED_PERMANENTLY
+        assert response["Location"].endswith("/shop/oreh/?ref=mail")
+
+        response = self.client.get(f"{url}oreh/")
+        assert response.status_code == HTTPStatus.OK
+        assert response.context["product"] == self.product
+        assert self.client.get(f"{url}missing/").status_code == HTTPStatus.NOT_FOUND
+
+        # A cached slug resolution never redirects to a hidden product.
+        Product.objects.filter(pk=self.product.pk).update(live=False)
+        assert self.client.get(f"{url}walnut/").status_code == HTTPStatus.NOT_FOUND
+
+    def test_resolved_slugs_are_cached(self):
+        """Test that a repeat visit looks the product up by primary key only."""
+        url = f"{self.shop_page.url}oreh/"
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert not any('"slug_en" =' in query["sql"] for query in queries)
+
+        Product.objects.filter(pk=self.product.pk).update(live=False)
+        bump_catalog_version()
+        assert self.client.get(url).status_code == HTTPStatus.NOT_FOUND
+
+
+class ProductPageTemplateTests(CatalogSiteTestCase):
+    """Tests for the cached ProductPage blocks on product detail pages."""
+
+    def setUp(self):
+        """Create the ProductPage template of the catalog and a product."""
+        super().setUp()
+        self.product_page = ProductPage(title="Product", body=self.tabs("Delivery"))
+        self.shop_page.add_child(instance=self.product_page)
+        Product.objects.create(title="Walnut", slug="walnut", price=100)
+        self.url = f"{self.shop_page.url}walnut/"
+
+    @staticmethod
+    def tabs(title):
+        """Return raw StreamField data for a single tab section."""
+        tab = {"title": title, "image": None, "content": "<p>Text</p>"}
+        return [{"type": "tabs_section", "value": {"tabs": [tab]}}]
+
+    def test_blocks_are_cached_until_publish(self):
+        """Test that repeat visits skip the ProductPage and publishes refresh it."""
+        self.assertContains(self.client.get(self.url), "Delivery")
+        with CaptureQueriesContext(connection) as queries:
+            self.assertContains(self.client.get(self.url), "Delivery")
+        assert not any("shop_productpage" in query["sql"] for query in queries)
+
+        self.product_page.body = self.tabs("Payment")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product_page.save_revision().publish()
+        response = self.client.get(self.url)
+        self.assertContains(response, "Payment")
+        self.assertContains(response, "<p>Text</p>")
+        self.assertNotContains(response, "Delivery")
+
+
+class ProductDetailCacheTests(TemporaryMediaMixin, CatalogSiteTestCase):
+    """Tests for the anonymous product detail page cache."""
+
+    def setUp(self):
+        """Create products, one recommending another."""
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.walnut = Product.objects.create(
+                title="Walnut", slug="walnut", price=100
+            )
+            self.almond = Product.objects.create(
+                title="Almond", slug="almond", price=200
+            )
+            Product.objects.create(title="Cashew", slug="cashew", price=300)
+            ProductRecommendation.objects.create(
+                product=self.walnut, recommended=self.almond, score=1, rank=1
+            )
+
+    def get_uncached(self, slug):
+        """Request a product page and return whether it was rendered.
+
+        Slug resolution may query the products again after a catalog change,
+        so only the recommendations query marks a render.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"{self.shop_page.url}{slug}/")
+        assert response.status_code == HTTPStatus.OK
+        assert CSRF_TOKEN_PLACEHOLDER not in response.content.decode()
+        return any("shop_productrecommendation" in query["sql"] for query in queries)
+
+    def test_pages_are_purged_per_product(self):
+        """Test that a change only drops the pages showing the changed product."""
+        for slug in ("walnut", "almond", "cashew"):
+            assert self.get_uncached(slug)
+            assert not self.get_uncached(slug)
+
+        self.almond.title = "Roasted almond"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.almond.save()
+
+        assert self.get_uncached("almond")
+        assert self.get_uncached("walnut")
+        assert not self.get_uncached("cashew")
+        self.assertContains(
+            self.client.get(f"{self.shop_page.url}walnut/"), "Roasted almond"
+        )
+
+    def get_detail_queries(self):
+        """Return the catalog and image queries of a rendered product page."""
+        url = f"{self.shop_page.url}walnut/"
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        return [
+            query["sql"]
+            for query in queries
+            if "shop_product" in query["sql"] or "wagtailimages" in query["sql"]
+        ]
+
+    @override_settings(SHOP_CATALOG_PAGE_CACHE=False)
+    def test_detail_query_budget_is_fixed(self):
+        """Test that gallery images and tastes add no queries to the detail page."""
+        image = get_image_model().objects.create(
+            title="Nut", file=get_test_image_file()
+        )
+        weight = ProductWeight.objects.create(name="100g", value=100)
+        Product.objects.filter(pk=self.walnut.pk).update(weight_option=weight)
+        ProductGalleryImage.objects.create(product=self.walnut, image=image)
+        self.walnut.tastes.add(ProductTaste.objects.create(name="Salted"))
+        small_queries = self.get_detail_queries()
+
+        for sort_order in range(1, 4):
+            ProductGalleryImage.objects.create(
+                product=self.walnut, image=image, sort_order=sort_order
+            )
+        self.walnut.tastes.add(ProductTaste.objects.create(name="Sweet"))
+        large_queries = self.get_detail_queries()
+
+        # Product, gallery, images, renditions, tastes and recommendations.
+        assert len(small_queries) == len(large_queries) == 6  # noqa: PLR2004
+
+
+class SessionCartTests(CatalogSiteTestCase):
+    """Tests for the Redis-backed carts of anonymous visitors."""
+
+    def setUp(self):
+        """Create two products."""
+        super().setUp()
+        self.walnut = Product.objects.create(title="Walnut", slug="walnut", price=100)
+        self.almond = Product.objects.create(title="Almond", slug="almond", price=50)
+
+    def get_totals(self):
+        """Return the item count and total price of the visitor's cart."""
+        data = self.client.get("/shop/api/v1/cart/").json()
+        return data["total_items"], data["total_price"]
+
+    def test_anonymous_cart_stays_out_of_the_database(self):
+        """Test that lines, count and total are kept in Redis only."""
+        self.client.post(f"/shop/api/cart/add/{self.walnut.id}/", {"quantity": 2})
+        self.client.post(f"/shop/api/cart/add/{self.almond.id}/")
+        self.client.post(
+            f"/shop/api/cart/item/{self.walnut.id}/update/", {"action": "decrease"}
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/shop/api/cart/count/")
+        self.assertContains(response, ">2<")
+        assert not any("shop_" in query["sql"] for query in queries)
+        assert self.get_totals() == (2, 150)
+
+        self.client.post(f"/shop/api/cart/item/{self.almond.id}/remove/")
+        assert self.get_totals() == (1, 100)
+        assert not Cart.objects.exists()
+
+    def test_batch_changes_the_session_cart(self):
+        """Test that a batch changes and removes lines of a Redis cart."""
+        self.client.post(f"/shop/api/cart/add/{self.walnut.id}/")
+        self.client.post(f"/shop/api/cart/add/{self.almond.id}/")
+        response = self.client.post(
+            "/shop/api/cart/batch/",
+            {
+                "changes": [
+                    {"item_id": self.walnut.id, "delta": 2},
+                    {"item_id": self.almond.id, "remove": True},
+                ]
+            },
+            content_type="application/json",
+        )
+        self.assertContains(response, "id='cart-counter'")
+        assert self.get_totals() == (3, 300)
+
+    def test_missing_lines_do_not_start_a_session(self):
+        """Test that changing a line of an empty cart sets no session cookie."""
+        for url in (
+            f"/shop/api/cart/item/{self.walnut.id}/update/",
+            f"/shop/api/cart/item/{self.walnut.id}/remove/",
+        ):
+            response = self.client.post(url, {"action": "increase"}, follow=True)
+            assert response.status_code == HTTPStatus.NOT_FOUND
+        self.client.post(
+            "/shop/api/cart/batch/",
+            {"changes": [{"item_id": self.walnut.id, "delta": 1}]},
+            content_type="application/json",
+        )
+        assert settings.SESSION_COOKIE_NAME not in self.client.cookies
+        assert not get_redis_connection("default").keys("shop:cart:items:*")
+
+    def test_correction_skips_concurrent_changes(self):
+        """Test that a count correction never overwrites a concurrent change."""
+        self.client.post(f"/shop/api/cart/add/{self.walnut.id}/", {"quantity": 2})
+        Product.objects.filter(pk=self.walnut.pk).update(price=120)
+        redis = get_redis_connection("default")
+        key = f"shop:cart:items:{self.client.session[SESSION_CART_KEY]}"
+
+        def add_almond(execute, sql, params, many, context):
+            """Add an almond to the cart while the summary reads the products."""
+            if "shop_product" in sql and not redis.hexists(key, "concurrent"):
+                redis.hset(key, mapping={f"item:{self.almond.id}": 1, "concurrent": 1})
+                redis.hincrby(key, "count", 1)
+                redis.hincrby(key, "total", 50)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(add_almond):
+            assert self.get_totals() == (2, 240)
+        assert int(redis.hget(key, "count")) == 3  # noqa: PLR2004
+        assert self.get_totals() == (3, 290)
+
+    def test_cart_is_persisted_on_login(self):
+        """Test that logging in adds the session cart to the user's cart."""
+        user = get_user_model().objects.create_user("buyer", password="secret")  # noqa: S106
+        cart = Cart.objects.create(user=user)
+        CartItem.objects.create(cart=cart, product=self.walnut, quantity=1)
+        self.client.post(f"/shop/api/cart/add/{self.walnut.id}/", {"quantity": 2})
+        self.client.post(f"/shop/api/cart/add/{self.almond.id}/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.force_login(user)
+
+        assert sorted(cart.items.values_list("product__slug", "quantity")) == [
+            ("almond", 1),
+            ("walnut", 3),
+        ]
+        assert self.get_totals() == (4, 350)
+        assert not get_redis_connection("default").keys("shop:cart:items:*")
+
+    @override_settings(SHOP_ANONYMOUS_CART_BACKEND="shop.carts.DatabaseCart")
+    def test_database_cart_is_merged_on_login(self):
+        """Test that login merges a database session cart without Redis."""
+        user = get_user_model().objects.create_user("buyer", password="secret")  # noqa: S106
+        cart = Cart.objects.create(user=user)
+        CartItem.objects.create(cart=cart, product=self.walnut, quantity=1)
+        self.client.post(f"/shop/api/cart/add/{self.walnut.id}/", {"quantity": 2})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.force_login(user)
+
+        assert list(Cart.objects.all()) == [cart]
+        assert list(cart.items.values_list("product__slug", "quantity")) == [
+            ("walnut", 3)
+        ]
+        assert not get_redis_connection("default").keys("shop:cart:items:*")
+
+    def test_checkout_orders_the_session_cart(self):
+        """Test that checkout turns the session cart into an order."""
+        cart_page = CartPage(title="Cart")
+        self.homepage.add_child(instance=cart_page)
+        checkout_page = CheckoutPage(title="Checkout")
+        cart_page.add_child(instance=checkout_page)
+        self.client.post(f"/shop/api/cart/add/{self.walnut.id}/", {"quantity": 2})
+        self.assertContains(self.client.get(cart_page.url), "Walnut")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                checkout_page.url,
+                {
+                    "first_name": "Buyer",
+                    "phone": "+380000000000",
+                    "email": "buyer@example.com",
+                    "delivery_method": Order.Delivery.PICKUP,
+                    "payment_method": Order.Payment.CASH,
+                },
+            )
+
+        order = Order.objects.get()
+        assert (order.items_count, order.total_amount) == (2, 200)
+        assert self.get_totals() == (0, 0)
+
+
+class UserCartTests(WagtailPageTestCase):
+    """Tests for the database carts of logged-in users."""
+
+    def setUp(self):
+        """Log a user in with a cart of three lines."""
+        cache.clear()
+        user = get_user_model().objects.create_user("buyer", password="secret")  # noqa: S106
+        cart = Cart.objects.create(user=user)
+        for index in range(3):
+            product = Product.objects.create(
+                title=f"Product {index}", slug=f"product-{index}", price=100 + index
+            )
+            CartItem.objects.create(cart=cart, product=product, quantity=index + 1)
+        self.client.force_login(user)
+
+    def test_summary_is_read_with_one_query(self):
+        """Test that lines, count and total come from a single cart query."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/shop/api/v1/cart/")
+        data = response.json()
+        assert len(data["items"]) == 3  # noqa: PLR2004
+        assert data["total_items"] == 6  # noqa: PLR2004
+        assert data["total_price"] == 100 + 2 * 101 + 3 * 102
+        assert sum("shop_cartitem" in query["sql"] for query in queries) == 1
+
+    def test_quantity_click_reads_the_cart_once(self):
+        """Test that all fragments of an update render from one read query."""
+        item = CartItem.objects.filter(quantity=1).get()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                f"/shop/api/cart/item/{item.id}/update/", {"action": "increase"}
+            )
+        assert response.status_code == HTTPStatus.OK
+        self.assertContains(response, "id='cart-counter'")
+        self.assertContains(response, "checkout-bottom-total")
+
+        sql = [query["sql"].lstrip() for query in queries]
+        write = next(i for i, query in enumerate(sql) if query.startswith("WITH"))
+        reads = [
+            query
+            for query in sql[write:]
+            if query.startswith("SELECT")
+            and ("shop_cartitem" in query or "shop_product" in query)
+        ]
+        assert len(reads) == 1
+
+    def test_lines_are_changed_by_single_statements(self):
+        """Test that adds and decreases, down to zero, are single statements."""
+        item = CartItem.objects.filter(quantity=1).get()
+        url = f"/shop/api/cart/add/{item.product_id}/"
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(url, {"quantity": 2})
+        writes = [q["sql"] for q in queries if not q["sql"].startswith("SELECT")]
+        assert len(writes) == 1
+        assert "ON CONFLICT" in writes[0]
+        item.refresh_from_db()
+        assert item.quantity == 3  # noqa: PLR2004
+
+        url = f"/shop/api/cart/item/{item.id}/update/"
+        for _click in range(3):
+            with CaptureQueriesContext(connection) as queries:
+                self.client.post(url, {"action": "decrease"})
+            writes = [
+                q["sql"] for q in queries if not q["sql"].lstrip().startswith("SELECT")
+            ]
+            assert len(writes) == 1
+            assert "DELETE" in writes[0]
+        assert not CartItem.objects.filter(pk=item.pk).exists()
+        response = self.client.post(url, {"action": "decrease"}, follow=True)
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_batch_applies_all_changes_at_once(self):
+        """Test that a batch updates and deletes lines with two statements."""
+        first, second, third = CartItem.objects.order_by("quantity")
+        changes = [
+            {"item_id": first.id, "delta": 2},
+            {"item_id": first.id, "delta": 1},
+            {"item_id": second.id, "delta": -2},
+            {"item_id": third.id, "delta": 5},
+            {"item_id": third.id, "remove": True},
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                "/shop/api/cart/batch/",
+                {"changes": changes},
+                content_type="application/json",
+            )
+        assert response.status_code == HTTPStatus.OK
+        self.assertContains(response, "id='cart-counter'")
+        self.assertContains(response, "checkout-bottom-total")
+        sql = [query["sql"].lstrip() for query in queries]
+        writes = [query for query in sql if query.startswith(("UPDATE", "DELETE"))]
+        assert len(writes) == 2  # noqa: PLR2004
+        assert list(CartItem.objects.values_list("pk", "quantity")) == [(first.id, 4)]
+
+    def test_quantities_are_bounded(self):
+        """Test that oversized changes are rejected and sums are clamped."""
+        item = CartItem.objects.filter(quantity=1).get()
+        response = self.client.post(
+            "/shop/api/cart/batch/",
+            {"changes": [{"item_id": item.id, "delta": 2**31}]},
+            content_type="application/json",
+        )
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+        response = self.client.post(
+            f"/shop/api/cart/add/{item.product_id}/", {"quantity": 2**31}
+        )
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+        changes = [{"item_id": item.id, "delta": MAX_LINE_QUANTITY}] * 2
+        response = self.client.post(
+            "/shop/api/cart/batch/",
+            {"changes": changes},
+            content_type="application/json",
+        )
+        assert response.status_code == HTTPStatus.OK
+        self.client.post(
+            f"/shop/api/cart/add/{item.product_id}/", {"quantity": MAX_LINE_QUANTITY}
+        )
+        item.refresh_from_db()
+        assert item.quantity == MAX_LINE_QUANTITY
@@ -2,7 +2,13 @@
 
 from modeltranslation.translator import TranslationOptions, register
 
-from .models import Product, ProductPackaging, ProductTaste, ProductWeight
+from .models import (
+    Product,
+    ProductListing,
+    ProductPackaging,
+    ProductTaste,
+    ProductWeight,
+)
 
 
 @register(Product)
@@ -40,3 +46,16 @@ class ProductTasteTranslationOptions(TranslationOptions):
     """Translation configuration for product flavor/taste names."""
 
     fields = ("name",)
+
+
+@register(ProductListing)
+class ProductListingTranslationOptions(TranslationOptions):
+    """Translation configuration for the per-locale values of catalog cards."""
+
+    fields = (
+        "title",
+        "slug",
+        "taste_names",
+        "weight_name",
+        "packaging_name",
+    )
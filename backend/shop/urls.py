@@ -5,13 +5,24 @@ from ninja import NinjaAPI
 
 from . import views
 from .api import router as shop_router
+from .api_v1 import router as catalog_router
+from .renderers import FastJSONRenderer
 
 api = NinjaAPI(urls_namespace="shop_api", title="Shop API", docs_url="/docs/")
+api_v1 = NinjaAPI(
+    urls_namespace="shop_api_v1",
+    title="Shop Catalog API",
+    version="1.0",
+    docs_url="/docs/",
+    renderer=FastJSONRenderer(),
+)
 
 
 api.add_router("/", shop_router)
+api_v1.add_router("/", catalog_router)
 
 urlpatterns = [
+    path("api/v1/", api_v1.urls),
     path("api/", api.urls),
     path("payment/<str:order_number>/", views.mock_payment, name="mock_payment"),
 ]
@@ -0,0 +1,126 @@
+"""shop/warmup.py."""
+
+import logging
+from datetime import timedelta
+from http import HTTPStatus
+from urllib.parse import urlencode
+
+from celery import current_app
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import transaction
+from django.http import Http404
+from django.test import RequestFactory
+from django.urls import Resolver404, resolve
+from django.utils import timezone, translation
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+HITS_KEY_PREFIX = "shop:catalog:hits"
+HITS_DAYS = 2
+WARMUP_LOCK_KEY = "shop:catalog:warmup:scheduled"
+# Catalog changes within this many seconds are warmed by a single run.
+WARMUP_DELAY = 30
+WARMUP_URL_LIMIT = 50
+
+# Query parameters a catalog listing response depends on (see
+# ShopIndexPage.get_listing_key_parts); anything else is dropped from stats.
+LISTING_PARAMS = ("taste", "weight", "price_min", "price_max", "sort", "page", "cursor")
+
+
+def _hits_key(language, day):
+    """Return the key of the hit counters of one language and day."""
+    return f"{HITS_KEY_PREFIX}:{language}:{day:%Y%m%d}"
+
+
+def record_catalog_hit(request):
+    """Count a cacheable catalog request towards the URLs worth warming.
+
+    Hits are kept in a Redis sorted set per language and day, keyed by the
+    HTMX flag, the host and the path with only the listing parameters.
+    """
+    params = [
+        (name, value) for name in LISTING_PARAMS for value in request.GET.getlist(name)
+    ]
+    path = f"{request.path}?{urlencode(params)}" if params else request.path
+    is_htmx = request.headers.get("HX-Request") == "true"
+    member = f"{'htmx' if is_htmx else 'full'} {request.get_host()} {path}"
+    key = _hits_key(translation.get_language(), timezone.now())
+    try:
+        redis = get_redis_connection("default")
+        pipeline = redis.pipeline(transaction=False)
+        pipeline.zincrby(key, 1, member)
+        pipeline.expire(key, timedelta(days=HITS_DAYS + 1))
+        pipeline.execute()
+    except RedisError:
+        logger.warning("Could not record a catalog hit", exc_info=True)
+
+
+def get_hot_catalog_urls(language, limit=WARMUP_URL_LIMIT):
+    """Return the most requested ``(is_htmx, host, path)`` of recent days."""
+    redis = get_redis_connection("default")
+    today = timezone.now()
+    scores = {}
+    for days_ago in range(HITS_DAYS):
+        key = _hits_key(language, today - timedelta(days=days_ago))
+        for member, score in redis.zrevrange(key, 0, limit - 1, withscores=True):
+            name = member.decode() if isinstance(member, bytes) else member
+            scores[name] = scores.get(name, 0) + score
+    hottest = sorted(scores, key=scores.get, reverse=True)[:limit]
+    return [
+        (kind == "htmx", host, path)
+        for kind, host, path in (member.split(" ", 2) for member in hottest)
+    ]
+
+
+def warm_catalog_cache(limit=WARMUP_URL_LIMIT):
+    """Render the hottest catalog URLs of every language into the page cache.
+
+    Each URL is resolved and served for an anonymous request built with
+    ``RequestFactory``, so the cache entries are the ones visitors would
+    produce. Returns the number of URLs rendered.
+    """
+    factory = RequestFactory()
+    warmed = 0
+    for language, _name in settings.LANGUAGES:
+        for is_htmx, host, path in get_hot_catalog_urls(language, limit):
+            headers = {"X-Cache-Warmup": "true"}
+            if is_htmx:
+                headers["HX-Request"] = "true"
+            request = factory.get(path, headers=headers, HTTP_HOST=host)
+            request.user = AnonymousUser()
+            with translation.override(language):
+                try:
+                    match = resolve(request.path_info)
+                    status = match.func(
+                        request, *match.args, **match.kwargs
+                    ).status_code
+                except (Http404, Resolver404):
+                    status = HTTPStatus.NOT_FOUND
+            if status == HTTPStatus.OK:
+                warmed += 1
+            else:
+                logger.warning("Cache warmup of %s returned %s", path, status)
+    logger.info("Warmed %d catalog URLs", warmed)
+    return warmed
+
+
+def schedule_catalog_warmup():
+    """Queue a cache warmup run after a catalog change, once per burst of changes.
+
+    The run is delayed by ``WARMUP_DELAY`` seconds; changes made meanwhile
+    are covered by the same run, since it renders the catalog as it is then.
+    """
+    if not settings.SHOP_CATALOG_WARMUP:
+        return
+    if not cache.add(WARMUP_LOCK_KEY, 1, WARMUP_DELAY):
+        return
+
+    transaction.on_commit(
+        lambda: current_app.send_task(
+            "shop.tasks.warm_catalog_cache_task", countdown=WARMUP_DELAY
+        )
+    )
@@ -1,12 +1,13 @@
 """users/models/pages.py."""
 
-from contacts.blocks import ContactImportBlock  # Импортируем блок контактов
 from django.shortcuts import redirect
 from django.utils.translation import gettext_lazy as _
 from wagtail.admin.panels import FieldPanel
 from wagtail.fields import RichTextField, StreamField
 from wagtail.models import Page
 
+from contacts.blocks import ContactImportBlock  # Импортируем блок контактов
+
 
 class RegistrationPage(Page):
     """Wagtail model for the Registration page.
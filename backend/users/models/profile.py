@@ -2,19 +2,20 @@
 
 import logging
 
-from contacts.blocks import ContactImportBlock
 from django.contrib import messages
 from django.contrib.auth import update_session_auth_hash
 from django.db import models, transaction
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
-from shop.models.ecommerce import Order, PaymentTransaction
 from wagtail.admin.panels import FieldPanel
 from wagtail.contrib.routable_page.models import RoutablePageMixin, route
 from wagtail.fields import StreamField
 from wagtail.models import Page
 
+from contacts.blocks import ContactImportBlock
+from shop.models.ecommerce import Order, PaymentTransaction
+
 # pylint: disable=no-member, disable=duplicate-code
 
 logger = logging.getLogger(__name__)